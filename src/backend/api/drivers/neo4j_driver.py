@@ -1,18 +1,43 @@
+import os
+import threading
+
 from neo4j import GraphDatabase
 from config import NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD  # Import credentials
 
 class Neo4jDriver:
     """Singleton class to manage a persistent Neo4j driver."""
-    
+
     _driver = None
+    _lock = threading.Lock()
 
     @classmethod
     def get_driver(cls):
-        """Returns a single instance of the Neo4j driver."""
+        """Returns a single instance of the Neo4j driver, created on first use."""
         if cls._driver is None:
-            cls._driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+            # Double-checked locking: FastAPI mixes threads and coroutines, so
+            # two first-callers could otherwise race and open two drivers
+            with cls._lock:
+                if cls._driver is None:
+                    cls._driver = GraphDatabase.driver(
+                        NEO4J_URI,
+                        auth=(NEO4J_USERNAME, NEO4J_PASSWORD),
+                        max_connection_pool_size=int(os.getenv("NEO4J_POOL", 100)),
+                        connection_acquisition_timeout=float(os.getenv("NEO4J_ACQ_TIMEOUT", 60)),
+                        connection_timeout=15,
+                        max_connection_lifetime=3600,
+                    )
         return cls._driver
 
+    @classmethod
+    def session(cls, **kwargs):
+        """Opens a session against the configured database.
+
+        Naming the database explicitly skips the home-database routing lookup
+        the server otherwise performs for every new session.
+        """
+        kwargs.setdefault("database", os.getenv("NEO4J_DB", "neo4j"))
+        return cls.get_driver().session(**kwargs)
+
     @classmethod
     def close_driver(cls):
         """Closes the Neo4j driver connection."""
@@ -21,20 +46,15 @@ class Neo4jDriver:
             cls._driver = None
 
     def query(self, query, parameters=None, fetch=True):
-        with self._driver.session() as session:
+        with self.session() as session:
             result = session.run(query, parameters)
-            return [record.data() for record in result] if fetch else None            
-
-
+            return [record.data() for record in result] if fetch else None
 
-# Initialize the driver at module load (optional, for eager loading)
-driver = Neo4jDriver.get_driver()
 
 # # Testing the driver:
 # if __name__ == "__main__":
 #     try:
-#         with driver.session() as session:
-#             print(NEO4J_PASSWORD, NEO4J_URI, NEO4J_USERNAME, "HEYHEYHEY")
+#         with Neo4jDriver.session() as session:
 #             # Run a simple query to test the connection.
 #             result = session.run("RETURN 'Hello, Neo4j!' AS message")
 #             record = result.single()
@@ -5,12 +5,196 @@ that cover all CVEs for each package.
 """
 import argparse
 from neo4j import GraphDatabase
-import json
+import heapq
+import itertools
+import orjson
 import time
 from datetime import datetime
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from ..osv.neo4j_connection import get_neo4j_driver
 
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _greedy_cover_compiled(indptr, indices, n_vulns):
+        """Classical greedy over a CSR version-by-vulnerability matrix.
+
+        Compiled with cache=True so the ~30s first-call compile is paid once
+        per machine, not once per run. Returns selected row indices.
+        """
+        n_versions = indptr.shape[0] - 1
+        uncovered = np.ones(n_vulns, np.uint8)
+        remaining = n_vulns
+        selected = np.empty(n_versions, np.int32)
+        n_selected = 0
+        while remaining > 0:
+            best = -1
+            best_count = 0
+            for row in range(n_versions):
+                count = 0
+                for k in range(indptr[row], indptr[row + 1]):
+                    count += uncovered[indices[k]]
+                if count > best_count:
+                    best_count = count
+                    best = row
+            if best < 0:
+                break
+            selected[n_selected] = best
+            n_selected += 1
+            for k in range(indptr[best], indptr[best + 1]):
+                if uncovered[indices[k]]:
+                    uncovered[indices[k]] = 0
+                    remaining -= 1
+        return selected[:n_selected]
+
+
+@dataclass(slots=True)
+class PackageRecord:
+    """One package's metadata plus its vulnerability → affected-versions map.
+
+    Keeps metadata out of the vuln mapping so consumers iterate
+    vuln_versions directly instead of filtering out 'ecosystem'/'purl' keys.
+    """
+    ecosystem: str
+    purl: str
+    vuln_versions: dict = field(default_factory=dict)
+
+
+def _big_step_cover(version_mask, uncovered, step_size):
+    """Big-step greedy: commit the best union of up to step_size versions per iteration.
+
+    Candidates are shortlisted by individual coverage so the combination
+    search stays small; unions are evaluated by OR-ing the bitmasks.
+    """
+    selected_versions = []
+    shortlist_size = 4 * step_size
+    while uncovered:
+        ranked = sorted(
+            ((mask & uncovered).bit_count(), version)
+            for version, mask in version_mask.items()
+            if version not in selected_versions
+        )
+        shortlist = [version for count, version in ranked[-shortlist_size:] if count > 0]
+        if not shortlist:
+            break
+
+        best_combo = None
+        best_covered = 0
+        for size in range(1, min(step_size, len(shortlist)) + 1):
+            for combo in itertools.combinations(shortlist, size):
+                union = 0
+                for version in combo:
+                    union |= version_mask[version]
+                covered = (union & uncovered).bit_count()
+                if covered > best_covered:
+                    best_covered = covered
+                    best_combo = combo
+
+        for version in best_combo:
+            if version_mask[version] & uncovered:
+                selected_versions.append(version)
+                uncovered &= ~version_mask[version]
+    return selected_versions
+
+
+def _solve_one_package(task):
+    """Compute the minimal version set for a single package.
+
+    Module-level so ProcessPoolExecutor can pickle it; takes and returns
+    plain (package_name, result) pairs.
+    """
+    package_name, record, step_size = task
+    vuln_to_versions = record.vuln_versions
+
+    if not vuln_to_versions:
+        # No vulnerabilities for this package
+        return package_name, {
+            "ecosystem": record.ecosystem,
+            "purl": record.purl,
+            "minimal_versions": [],
+            "total_vulnerabilities": 0,
+            "covered_by_minimal_set": 0
+        }, 0
+
+    # Create a version-to-vulnerabilities mapping
+    version_vuln_map = defaultdict(set)
+    for vuln_id, versions in vuln_to_versions.items():
+        for version in versions:
+            version_vuln_map[version].add(vuln_id)
+
+    # Encode each vulnerability as one bit of a Python int so coverage
+    # checks become C-level bitwise ops instead of hashing string ids
+    # through set intersections.
+    all_vulns = set(vuln_to_versions.keys())
+    vuln_bit = {vuln_id: 1 << i for i, vuln_id in enumerate(all_vulns)}
+    version_mask = {}
+    for version, vulns in version_vuln_map.items():
+        mask = 0
+        for vuln_id in vulns:
+            mask |= vuln_bit[vuln_id]
+        version_mask[version] = mask
+
+    uncovered = (1 << len(all_vulns)) - 1
+    selected_versions = []
+
+    if step_size > 1:
+        selected_versions = _big_step_cover(version_mask, uncovered, step_size)
+    elif njit is not None:
+        # Compiled greedy: the whole select/clear loop runs as machine
+        # code over CSR arrays, with no interpreter dispatch per row
+        ver_list = list(version_mask.keys())
+        indptr = np.zeros(len(ver_list) + 1, dtype=np.int64)
+        cols = []
+        for row, version in enumerate(ver_list):
+            for vuln_id in version_vuln_map[version]:
+                cols.append(vuln_bit[vuln_id].bit_length() - 1)
+            indptr[row + 1] = len(cols)
+        indices = np.array(cols, dtype=np.int64)
+        picked = _greedy_cover_compiled(indptr, indices, len(all_vulns))
+        selected_versions = [ver_list[i] for i in picked]
+    else:
+        # Greedy with a max-heap and lazy revalidation: coverage counts
+        # only shrink as vulns get covered, so a popped entry whose stored
+        # count still matches its real coverage is guaranteed to be the
+        # current best. Avoids rescanning every version per iteration
+        # while keeping the classical greedy's approximation guarantee.
+        heap = [(-mask.bit_count(), version) for version, mask in version_mask.items()]
+        heapq.heapify(heap)
+
+        while uncovered and heap:
+            neg_count, version = heapq.heappop(heap)
+            if neg_count == 0:
+                # Best possible coverage is zero: nothing left can help
+                break
+            covered = (version_mask[version] & uncovered).bit_count()
+            if -neg_count == covered:
+                selected_versions.append(version)
+                uncovered &= ~version_mask[version]
+            elif covered:
+                # Stale count: re-queue with the recomputed coverage
+                heapq.heappush(heap, (-covered, version))
+
+    # Calculate the total vulnerabilities covered by the minimal set
+    covered_vulns = set()
+    for version in selected_versions:
+        covered_vulns.update(version_vuln_map[version])
+
+    return package_name, {
+        "ecosystem": record.ecosystem,
+        "purl": record.purl,
+        "minimal_versions": selected_versions,
+        "total_vulnerabilities": len(all_vulns),
+        "covered_by_minimal_set": len(covered_vulns)
+    }, len(version_vuln_map)
+
+
 class VulnerabilityProcessor:
     def __init__(self, batch_size=5000):
         self._driver = None
@@ -27,17 +211,22 @@ class VulnerabilityProcessor:
             print("Neo4j connection closed.")
     
     def get_vulnerability_count(self, repo_name="OSV"):
-        """Get the total count of vulnerabilities in the database for a specific repo"""
+        """Get the total count of vulnerability relationships for a specific repo.
+
+        Optional since the main query no longer needs it for progress; kept
+        for callers that want the number on its own.
+        """
         if not self._driver:
             print("Error: Not connected to Neo4j. Call connect() first.")
             return 0
-            
+
         with self._driver.session() as session:
+            # Anchor on the (indexed) repo node and count AFFECTS edges with a
+            # pattern comprehension: the planner expands from one node instead
+            # of running the double MATCH the main query performs
             query = """
-            MATCH (v:Vulnerability)-[:BELONGS_TO]->(vr:VULN_REPO)
-            MATCH (v)-[:AFFECTS]->(p:Package)
-            WHERE vr.name = $repo_name
-            RETURN COUNT(*) AS count
+            MATCH (vr:VULN_REPO {name: $repo_name})<-[:BELONGS_TO]-(v:Vulnerability)
+            RETURN sum(size([(v)-[:AFFECTS]->(:Package) | 1])) AS count
             """
             result = session.run(query, {"repo_name": repo_name})
             record = result.single()
@@ -54,150 +243,106 @@ class VulnerabilityProcessor:
         package_cve_data = {}
         processed_count = 0
         start_time = time.time()
-        
-        total_count = self.get_vulnerability_count(repo_name)
-        print(f"Processing {total_count} vulnerability relationships for repo '{repo_name}'...")
-        
-        with self._driver.session() as session:
+
+        print(f"Processing vulnerability data for repo '{repo_name}'...")
+
+        # Bounded fetch_size keeps the driver streaming in fixed-size pages
+        # instead of buffering the whole result set in memory. No COUNT
+        # pre-pass: it was a full scan of the same pattern just for an ETA.
+        with self._driver.session(fetch_size=5_000) as session:
+            # Aggregate server-side: one row per package with all of its
+            # vulnerabilities collected, instead of one row per
+            # (vulnerability, package) pair with p.versions re-sent every time.
+            # The parallel runtime hint is safe here since this is read-only.
             query = """
-                MATCH (v:Vulnerability)-[:BELONGS_TO]->(vr:VULN_REPO)
+                CYPHER runtime=parallel
+                MATCH (v:Vulnerability)-[:BELONGS_TO]->(vr:VULN_REPO {name: $repo_name})
                 MATCH (v)-[:AFFECTS]->(p:Package)
-                WHERE vr.name = $repo_name
-                RETURN p.name AS package_name, p.ecosystem AS ecosystem, p.purl AS purl, 
-                       v.id AS vuln_id, p.versions AS affected_versions
-                ORDER BY p.name, v.id
+                RETURN p.name AS package_name, p.ecosystem AS ecosystem, p.purl AS purl,
+                       p.versions AS affected_versions,
+                       collect(DISTINCT v.id) AS vuln_ids
             """
-            
+
             result = session.run(query, {"repo_name": repo_name})
-            
+
             for record in result:
                 package_name = record['package_name']
-                ecosystem = record['ecosystem']
-                purl = record.get('purl', None)
-                vuln_id = record['vuln_id']
                 affected_versions = record['affected_versions']
-                
-                # Create package entry if it doesn't exist
-                if package_name not in package_cve_data:
-                    package_cve_data[package_name] = {
-                        'ecosystem': ecosystem,
-                        'purl': purl or ''
-                    }
-                
-                # Process affected versions
+
+                # Process affected versions: build the canonical set once;
+                # no list round-trips, consumers read sets throughout and
+                # JSON conversion happens only at save time
                 if isinstance(affected_versions, list):
-                    versions = affected_versions
+                    versions = set(affected_versions)
                 else:
-                    versions = [affected_versions]
-                
-                # Add vulnerability and its versions
-                if vuln_id not in package_cve_data[package_name]:
-                    package_cve_data[package_name][vuln_id] = list(set(versions))
+                    versions = {affected_versions}
+
+                # Every vulnerability of a package shares p.versions, so all
+                # entries can reference the same (read-only) set
+                existing = package_cve_data.get(package_name)
+                if existing is None:
+                    package_cve_data[package_name] = PackageRecord(
+                        ecosystem=record['ecosystem'],
+                        purl=record.get('purl', None) or '',
+                        vuln_versions={vuln_id: versions for vuln_id in record['vuln_ids']}
+                    )
                 else:
-                    # Merge versions if vulnerability already exists
-                    existing_versions = set(package_cve_data[package_name][vuln_id])
-                    existing_versions.update(versions)
-                    package_cve_data[package_name][vuln_id] = list(existing_versions)
-                
+                    # Same package name in another ecosystem (one aggregated
+                    # row per (name, ecosystem) group): merge its
+                    # vulnerabilities into the existing entry instead of
+                    # replacing it and losing the first ecosystem's data
+                    for vuln_id in record['vuln_ids']:
+                        prior = existing.vuln_versions.get(vuln_id)
+                        existing.vuln_versions[vuln_id] = (
+                            prior | versions if prior is not None else versions)
+
                 processed_count += 1
-                
+
                 if processed_count % progress_interval == 0:
                     elapsed = time.time() - start_time
-                    percent = (processed_count / total_count) * 100 if total_count > 0 else 0
-                    records_per_second = processed_count / elapsed if elapsed > 0 else 0
-                    eta_seconds = (total_count - processed_count) / records_per_second if records_per_second > 0 else 0
-                    
-                    print(f"Progress: {processed_count}/{total_count} ({percent:.1f}%) - "
-                          f"Speed: {records_per_second:.1f} records/sec - "
-                          f"ETA: {datetime.fromtimestamp(time.time() + eta_seconds).strftime('%H:%M:%S')}")
-        
-        print(f"Completed processing {processed_count} records in {time.time() - start_time:.1f} seconds")
+                    packages_per_second = processed_count / elapsed if elapsed > 0 else 0
+                    print(f"Progress: {processed_count} packages - "
+                          f"Speed: {packages_per_second:.1f} packages/sec")
+
+        print(f"Completed processing {processed_count} packages in {time.time() - start_time:.1f} seconds")
         
         return package_cve_data
     
-    def generate_minimal_version_sets(self, package_cve_data):
+    def generate_minimal_version_sets(self, package_cve_data, step_size=1, workers=None):
         """
         Generate a minimal set of versions that covers all CVEs for each package
+
+        step_size > 1 enables big-step greedy: each iteration shortlists the
+        top candidates by individual coverage and commits the combination of
+        up to step_size versions with the largest union, which typically
+        yields smaller covers than one-at-a-time selection.
+
+        Packages are independent, so they are solved in parallel across a
+        process pool; workers defaults to the CPU count.
+
+        Returns (minimal_version_sets, total_unique_versions); the stat falls
+        out of the per-package version maps, so callers don't need to re-walk
+        the input data to compute it.
         """
+        tasks = [(package_name, record, step_size)
+                 for package_name, record in package_cve_data.items()]
         minimal_version_sets = {}
-        
-        for package_name, package_data in package_cve_data.items():
-            # Extract all vulnerability IDs and their affected versions
-            ecosystem = package_data.get('ecosystem', '')
-            purl = package_data.get('purl', '')
-            
-            # Create a clean mapping of vulnerability ID to affected versions
-            vuln_to_versions = defaultdict(set)
-            
-            for key, value in package_data.items():
-                if key not in ['ecosystem', 'purl']:
-                    vuln_id = key
-                    # Convert to set to eliminate duplicates
-                    versions = set(value)
-                    vuln_to_versions[vuln_id].update(versions)
-            
-            if not vuln_to_versions:
-                # No vulnerabilities for this package
-                minimal_version_sets[package_name] = {
-                    "ecosystem": ecosystem,
-                    "purl": purl,
-                    "minimal_versions": [],
-                    "total_vulnerabilities": 0,
-                    "covered_by_minimal_set": 0
-                }
-                continue
-                
-            # Create a version-to-vulnerabilities mapping
-            version_vuln_map = defaultdict(set)
-            for vuln_id, versions in vuln_to_versions.items():
-                for version in versions:
-                    version_vuln_map[version].add(vuln_id)
-            
-            # Greedy algorithm to find minimal version sets
-            all_vulns = set(vuln_to_versions.keys())
-            remaining_vulns = set(all_vulns)
-            selected_versions = []
-            
-            while remaining_vulns:
-                # Find the version that covers the most remaining vulnerabilities
-                best_version = None
-                most_covered = 0
-                
-                for version, vulns in version_vuln_map.items():
-                    covered = len(vulns.intersection(remaining_vulns))
-                    if covered > most_covered:
-                        most_covered = covered
-                        best_version = version
-                
-                if best_version is None or most_covered == 0:
-                    # No more versions can cover remaining vulnerabilities
-                    break
-                    
-                # Add the best version
-                selected_versions.append(best_version)
-                remaining_vulns -= version_vuln_map[best_version]
-            
-            # Calculate the total vulnerabilities covered by the minimal set
-            covered_vulns = set()
-            for version in selected_versions:
-                covered_vulns.update(version_vuln_map[version])
-            
-            # Add the package and its minimal version set to the result
-            minimal_version_sets[package_name] = {
-                "ecosystem": ecosystem,
-                "purl": purl,
-                "minimal_versions": selected_versions,
-                "total_vulnerabilities": len(all_vulns),
-                "covered_by_minimal_set": len(covered_vulns)
-            }
-        
-        return minimal_version_sets
-    
+        total_unique_versions = 0
+        # chunksize keeps pickling overhead small relative to the per-package work
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for package_name, result, unique_versions in executor.map(
+                    _solve_one_package, tasks, chunksize=64):
+                minimal_version_sets[package_name] = result
+                total_unique_versions += unique_versions
+        return minimal_version_sets, total_unique_versions
+
     def save_minimal_version_sets(self, minimal_version_sets, output_file):
         """Save the minimal version sets to a JSON file"""
         try:
-            with open(output_file, 'w') as f:
-                json.dump(minimal_version_sets, f, indent=2)
+            # orjson encodes in C; keep the 2-space indent the downstream
+            # scripts and humans are used to
+            with open(output_file, 'wb') as f:
+                f.write(orjson.dumps(minimal_version_sets, option=orjson.OPT_INDENT_2))
             print(f"Minimal version sets saved to {output_file}")
             return True
         except Exception as e:
@@ -210,6 +355,8 @@ def main():
     parser.add_argument('--repo', help='Repository name to query (e.g., OSV)', default='OSV')
     parser.add_argument('--batch-size', type=int, help='Batch size for processing', default=5000)
     parser.add_argument('--progress-interval', type=int, help='Progress update interval', default=10000)
+    parser.add_argument('--step-size', type=int, default=1,
+                        help='Versions committed per greedy iteration (>1 enables big-step greedy)')
     
     args = parser.parse_args()
     
@@ -232,22 +379,14 @@ def main():
             
             # Generate minimal version sets
             print(f"Generating minimal version sets for {len(package_cve_data)} packages...")
-            minimal_version_sets = processor.generate_minimal_version_sets(package_cve_data)
-            
+            minimal_version_sets, total_versions_count = processor.generate_minimal_version_sets(
+                package_cve_data, step_size=args.step_size)
+
             # Save to file
             processor.save_minimal_version_sets(minimal_version_sets, args.output)
-            
-            # Print statistics
-            total_versions_count = 0
-            total_vulns_count = 0
-            
-            for package_name, package_data in package_cve_data.items():
-                unique_versions = set()
-                for key, versions in package_data.items():
-                    if key not in ['ecosystem', 'purl'] and versions:
-                        unique_versions.update(versions)
-                total_versions_count += len(unique_versions)
-            
+
+            # Print statistics (version totals come back from the solver, so
+            # the data isn't walked a second time here)
             minimal_versions_count = sum(len(data["minimal_versions"]) for data in minimal_version_sets.values())
             total_vulns_count = sum(data["total_vulnerabilities"] for data in minimal_version_sets.values())
             
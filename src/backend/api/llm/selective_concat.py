@@ -7,6 +7,8 @@ Usage:
     python selective_concat.py --package 101 --output prompt.txt --target-size 5000
 """
 import argparse
+import functools
+import heapq
 import json
 import tempfile
 import subprocess
@@ -16,8 +18,12 @@ import shutil
 import sys
 import os
 import time
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
+import ahocorasick
 
 # FILTER: Blocked file extensions
 BLOCKLISTED_EXTENSIONS = {
@@ -27,6 +33,19 @@ BLOCKLISTED_EXTENSIONS = {
 # FILTER: Max size limit
 MAX_FILE_SIZE = 200_000  # characters
 
+# Code extensions accepted without consulting mimetypes at all
+_TEXT_SUFFIXES = {'.js', '.ts', '.py', '.java', '.rb', '.c', '.cpp', '.h', '.php'}
+
+
+@functools.lru_cache(maxsize=None)
+def _mime_for_suffix(suffix: str):
+    """guess_type is a pure function of the suffix, so cache it per suffix."""
+    return mimetypes.guess_type('x' + suffix)[0]
+
+# Directory keywords that adjust a file's score (see score_file)
+SECURITY_DIR_KEYWORDS = ['auth', 'security', 'crypto', 'session', 'api']
+TEST_DIR_KEYWORDS = ['test', '__test__', 'spec', 'fixtures', 'mocks']
+
 # File priority rules (higher score = more important for vulnerability detection)
 FILE_PRIORITIES = {
     'index.js': 100,        # Main entry points are critical
@@ -86,53 +105,34 @@ def parse_purl(purl: str) -> dict:
                 qualifiers[k] = v
     return {'type': pkg_type, 'namespace': namespace, 'name': name, 'version': version, 'qualifiers': qualifiers}
 
-def check_npm_installed():
-    """Check if npm is installed and available in PATH"""
-    try:
-        # On Windows
-        if sys.platform == 'win32':
-            # Use 'where' command on Windows to find npm in PATH
-            result = subprocess.run('where npm', shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            return result.returncode == 0
-        else:
-            # On Unix
-            result = subprocess.run(['which', 'npm'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            return result.returncode == 0
-    except Exception:
-        return False
+# Resolve npm once at import: shutil.which handles PATH (and npm.cmd on
+# Windows) without spawning a where/which process per download
+_NPM_PATH = shutil.which('npm')
 
 def download_npm_package(name: str, version: str, dest: Path, debug=False) -> Path:
     """
-    Use `npm pack` to download a .tgz for the given package@version into dest and extract it.
-    Returns the path to the extracted directory.
+    Use `npm pack` to download a .tgz for the given package@version into dest.
+    Returns an open TarFile; callers stream members from it instead of
+    extracting the archive to disk.
     """
-    if not check_npm_installed():
+    if _NPM_PATH is None:
         raise RuntimeError("npm is not installed or not in your PATH. Please install Node.js and npm.")
-    
+
     pkg_id = f"{name}@{version}" if version else name
     try:
-        # Use shell=True on Windows
         if debug:
             print(f"Running npm pack for {pkg_id} in directory {dest}")
-            
-        if sys.platform == 'win32':
-            cmd = f'npm pack {pkg_id}'
-            if debug:
-                print(f"Command: {cmd}")
-            result = subprocess.run(cmd, 
-                                   cwd=str(dest), 
-                                   capture_output=True, 
-                                   text=True, 
-                                   shell=True)
-        else:
-            cmd = ['npm', 'pack', pkg_id]
-            if debug:
-                print(f"Command: {cmd}")
-            result = subprocess.run(cmd, 
-                                   cwd=dest, 
-                                   capture_output=True, 
-                                   text=True)
-        
+
+        # Full path from shutil.which works on every platform, so no shell
+        # and no per-call where/which probe
+        cmd = [_NPM_PATH, 'pack', pkg_id]
+        if debug:
+            print(f"Command: {cmd}")
+        result = subprocess.run(cmd,
+                               cwd=str(dest),
+                               capture_output=True,
+                               text=True)
+
         if debug:
             print(f"Command stdout: {result.stdout}")
             print(f"Command stderr: {result.stderr}")
@@ -157,20 +157,11 @@ def download_npm_package(name: str, version: str, dest: Path, debug=False) -> Pa
         # Make sure the tarball was actually created
         if not tar_path.exists():
             raise RuntimeError(f"npm pack did not create expected tarball: {tar_path}")
-        
-        if debug:
-            print(f"Extracting {tar_path} to {dest / 'package'}")
-            
-        extract_dir = dest / 'package'
-        with tarfile.open(tar_path, 'r:gz') as tf:
-            tf.extractall(path=extract_dir)
-        
-        if debug:
-            print(f"Extracted contents:")
-            for file in extract_dir.iterdir():
-                print(f"  {file}")
-        
-        return extract_dir
+
+        # Return the open tarball instead of extracting it: the selector
+        # streams members directly, so rejected files are never written to
+        # disk and selected ones are read exactly once
+        return tarfile.open(tar_path, 'r:gz')
     except Exception as e:
         if debug:
             import traceback
@@ -198,6 +189,19 @@ def download_deb_source(name: str, version: str, qualifiers: dict, dest: Path, d
             return entry
     raise RuntimeError(f"Extracted source directory not found for {name}")
 
+def _build_automaton(words):
+    """Compile keyword/value pairs into an Aho-Corasick automaton.
+
+    One automaton scan finds every keyword occurrence in a single C-level
+    pass over the string, replacing a Python loop of substring searches.
+    """
+    automaton = ahocorasick.Automaton()
+    for word, value in words:
+        automaton.add_word(word, (word, value))
+    automaton.make_automaton()
+    return automaton
+
+
 class SmartCompliantSelector:
     def __init__(self, target_size=5000, debug=False):
         self.target_size = target_size
@@ -205,24 +209,25 @@ class SmartCompliantSelector:
         self.selected_files = []
         self.total_size = 0
         self.exclusion_reasons = defaultdict(int)
-        
+        self._priority_automaton = _build_automaton(FILE_PRIORITIES.items())
+        self._boost_automaton = _build_automaton((k, k) for k in SECURITY_DIR_KEYWORDS)
+        self._penalty_automaton = _build_automaton((k, k) for k in TEST_DIR_KEYWORDS)
+
     def score_file(self, file_path, relative_path):
         """Score a file based on importance for vulnerability detection"""
-        score = 0
-        
-        # Check filename for security-relevant keywords
+        # Check filename for security-relevant keywords; the set() dedupes
+        # repeated hits so each keyword still counts once, as before
         filename_lower = file_path.name.lower()
-        for keyword, points in FILE_PRIORITIES.items():
-            if keyword in filename_lower:
-                score += points
-                
+        matched = {hit for _, hit in self._priority_automaton.iter(filename_lower)}
+        score = sum(points for _, points in matched)
+
         # Boost score for files in security-related directories
         path_lower = str(relative_path).lower()
-        if any(folder in path_lower for folder in ['auth', 'security', 'crypto', 'session', 'api']):
+        if next(self._boost_automaton.iter(path_lower), None) is not None:
             score += 50
-        
+
         # Penalize files in test directories (less relevant for vulnerability analysis)
-        if any(folder in path_lower for folder in ['test', '__test__', 'spec', 'fixtures', 'mocks']):
+        if next(self._penalty_automaton.iter(path_lower), None) is not None:
             score -= 30
         
         # Penalize deeply nested files (often less important)
@@ -232,83 +237,189 @@ class SmartCompliantSelector:
         
         return max(0, score)  # Don't allow negative scores
     
+    def _read_and_score(self, task):
+        """Read, decode, and score one pre-filtered file; None on read failure."""
+        file_path, relative_path = task
+        try:
+            # Raw read + decode avoids the slower pathlib read_text wrapper
+            with open(file_path, 'rb') as f:
+                content = f.read().decode('utf-8', 'ignore')
+        except Exception as e:
+            if self.debug:
+                print(f"Error reading {relative_path}: {e}")
+            return None
+
+        return {
+            'path': file_path,
+            'relative_path': relative_path,
+            'content': content,
+            'size': len(content),
+            'score': self.score_file(file_path, relative_path)
+        }
+
+    def select_from_tar(self, tf):
+        """Select the most important files straight from an open tarball.
+
+        Same filters as select_files, but applied to tar members so nothing
+        is written to disk: the blocklist/mime/size checks use the member
+        metadata and only surviving members get read and decoded.
+        """
+        candidates = []
+
+        for member in tf:
+            if not member.isfile():
+                continue
+            relative_path = PurePosixPath(member.name)
+
+            # COMPLIANCE: Skip hidden files or paths with hidden folders
+            if any(part.startswith(".") for part in relative_path.parts):
+                self.exclusion_reasons["dot_path"] += 1
+                continue
+
+            suffix = relative_path.suffix.lower()
+
+            # COMPLIANCE: Skip blocklisted extensions
+            if suffix in BLOCKLISTED_EXTENSIONS:
+                self.exclusion_reasons["blocklisted_extension"] += 1
+                continue
+
+            # COMPLIANCE: Check MIME type (cached per suffix; known code
+            # extensions skip the lookup entirely)
+            if suffix not in _TEXT_SUFFIXES:
+                mime_type = _mime_for_suffix(suffix)
+                if not mime_type or not mime_type.startswith("text/"):
+                    self.exclusion_reasons["not_text_mime"] += 1
+                    continue
+
+            # COMPLIANCE: Size precheck from the member header, before reading
+            if member.size > MAX_FILE_SIZE:
+                self.exclusion_reasons["too_large"] += 1
+                continue
+
+            try:
+                content = tf.extractfile(member).read().decode('utf-8', 'ignore')
+            except Exception as e:
+                self.exclusion_reasons["read_error"] += 1
+                if self.debug:
+                    print(f"Error reading {relative_path}: {e}")
+                continue
+
+            candidates.append({
+                'path': relative_path,
+                'relative_path': relative_path,
+                'content': content,
+                'size': len(content),
+                'score': self.score_file(relative_path, relative_path)
+            })
+
+        return self._pick_within_target(candidates)
+
     def select_files(self, repo_dir):
         """Select the most important files that fit within target size"""
         candidates = []
-        
-        # First pass: find and score all eligible files
-        for root, dirs, files in os.walk(repo_dir):
-            # COMPLIANCE: Skip hidden directories (starting with .)
-            dirs[:] = [d for d in dirs if not d.startswith(".")]
-            
-            for filename in files:
-                file_path = Path(root) / filename
-                relative_path = file_path.relative_to(repo_dir)
-                
-                # COMPLIANCE: Skip hidden files or paths with hidden folders
-                if any(part.startswith(".") for part in relative_path.parts):
-                    self.exclusion_reasons["dot_path"] += 1
+        eligible = []
+
+        # First pass: find all eligible files. scandir gives us
+        # cached stat info per entry, so every cheap filter (extension, mime,
+        # size) runs before any bytes of the file are read or decoded.
+        stack = [Path(repo_dir)]
+        while stack:
+            for entry in os.scandir(stack.pop()):
+                # COMPLIANCE: Skip hidden files and directories (starting with .)
+                if entry.name.startswith("."):
+                    if not entry.is_dir(follow_symlinks=False):
+                        self.exclusion_reasons["dot_path"] += 1
                     continue
-                
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                    continue
+
+                file_path = Path(entry.path)
+                relative_path = file_path.relative_to(repo_dir)
+                suffix = file_path.suffix.lower()
+
                 # COMPLIANCE: Skip blocklisted extensions
-                if file_path.suffix.lower() in BLOCKLISTED_EXTENSIONS:
+                if suffix in BLOCKLISTED_EXTENSIONS:
                     self.exclusion_reasons["blocklisted_extension"] += 1
                     continue
-                
+
                 try:
-                    # COMPLIANCE: Check MIME type
-                    mime_type, _ = mimetypes.guess_type(file_path)
-                    if not mime_type or not mime_type.startswith("text/"):
-                        # Check for common code extensions that might not have text MIME type
-                        valid_extensions = {'.js', '.ts', '.py', '.java', '.rb', '.c', '.cpp', '.h', '.php'}
-                        if file_path.suffix.lower() not in valid_extensions:
+                    # COMPLIANCE: Check MIME type (cached per suffix; known
+                    # code extensions skip the lookup entirely)
+                    if suffix not in _TEXT_SUFFIXES:
+                        mime_type = _mime_for_suffix(suffix)
+                        if not mime_type or not mime_type.startswith("text/"):
                             self.exclusion_reasons["not_text_mime"] += 1
                             continue
-                    
-                    # Read file content
-                    content = file_path.read_text(encoding='utf-8', errors='ignore')
-                    
-                    # COMPLIANCE: Check file size in characters
-                    if len(content) > MAX_FILE_SIZE:
+
+                    # COMPLIANCE: Size precheck on the cached stat before any
+                    # I/O — utf-8 byte count is an upper bound on characters,
+                    # so oversized files are skipped without reading them
+                    if entry.stat().st_size > MAX_FILE_SIZE:
                         self.exclusion_reasons["too_large"] += 1
                         continue
-                    
-                    # File passes all filters - score it
-                    score = self.score_file(file_path, relative_path)
-                    
-                    candidates.append({
-                        'path': file_path,
-                        'relative_path': relative_path,
-                        'content': content,
-                        'size': len(content),
-                        'score': score
-                    })
-                    
-                except Exception as e:
+                except OSError as e:
                     self.exclusion_reasons["read_error"] += 1
                     if self.debug:
                         print(f"Error reading {relative_path}: {e}")
                     continue
-        
-        # Sort by score (descending)
-        candidates.sort(key=lambda x: x['score'], reverse=True)
-        
-        # Second pass: select files that fit within target size
+
+                eligible.append((file_path, relative_path))
+
+        # Second: read and score eligible files on a thread pool — the GIL
+        # releases during file I/O, so reads overlap. Workers return results;
+        # only this thread touches candidates/exclusion_reasons.
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4)) as executor:
+            for candidate in executor.map(self._read_and_score, eligible):
+                if candidate is not None:
+                    candidates.append(candidate)
+                else:
+                    self.exclusion_reasons["read_error"] += 1
+
+        return self._pick_within_target(candidates)
+
+    def _pick_within_target(self, candidates):
+        """Keep the best-scored candidates that fit the target size.
+
+        Only a handful of files fit the budget, so a bounded heapq.nlargest
+        (O(N log k)) replaces a full sort (O(N log N)); the bound comes from
+        the median candidate size. A full sort of the leftovers only happens
+        in the rare case the shortlist doesn't fill the budget.
+        """
+        if not candidates:
+            return []
+
+        sizes = sorted(c['size'] for c in candidates)
+        median_size = sizes[len(sizes) // 2] or 1
+        k = max(32, (self.target_size // median_size) * 4)
+
+        shortlist = heapq.nlargest(k, candidates, key=itemgetter('score'))
+
         selected = []
         current_size = 0
-        
-        for candidate in candidates:
-            # Include file if it fits within target
-            if current_size + candidate['size'] <= self.target_size:
-                selected.append(candidate)
-                current_size += candidate['size']
-                
-                if self.debug:
-                    print(f"Selected: {candidate['relative_path']} (score: {candidate['score']}, size: {candidate['size']})")
-            else:
-                if self.debug:
-                    print(f"Skipped: {candidate['relative_path']} (would exceed target size)")
-        
+
+        def pack(pool):
+            nonlocal current_size
+            for candidate in pool:
+                # Include file if it fits within target
+                if current_size + candidate['size'] <= self.target_size:
+                    selected.append(candidate)
+                    current_size += candidate['size']
+
+                    if self.debug:
+                        print(f"Selected: {candidate['relative_path']} (score: {candidate['score']}, size: {candidate['size']})")
+                else:
+                    if self.debug:
+                        print(f"Skipped: {candidate['relative_path']} (would exceed target size)")
+
+        pack(shortlist)
+
+        if current_size < self.target_size and len(shortlist) < len(candidates):
+            shortlisted = {id(candidate) for candidate in shortlist}
+            rest = sorted((c for c in candidates if id(c) not in shortlisted),
+                          key=itemgetter('score'), reverse=True)
+            pack(rest)
+
         return selected
     
     def generate_concatenated_string(self, selected_files):
@@ -356,17 +467,19 @@ def main():
     # Download package
     try:
         with tempfile.TemporaryDirectory() as tmpdir:
+            selector = SmartCompliantSelector(target_size=args.target_size, debug=args.debug)
+
             if info['type'] == 'npm':
-                extract_dir = download_npm_package(info['name'], info['version'], Path(tmpdir), args.debug)
+                # npm tarballs are streamed member-by-member, never extracted
+                with download_npm_package(info['name'], info['version'], Path(tmpdir), args.debug) as tf:
+                    selected_files = selector.select_from_tar(tf)
             elif info['type'] == 'deb':
                 extract_dir = download_deb_source(info['name'], info['version'], info['qualifiers'], Path(tmpdir), args.debug)
+                selected_files = selector.select_files(extract_dir)
             else:
                 print(f"Error: ecosystem '{info['type']}' not supported yet.")
                 return
-            
-            # Select and concatenate files
-            selector = SmartCompliantSelector(target_size=args.target_size, debug=args.debug)
-            selected_files = selector.select_files(extract_dir)
+
             result = selector.generate_concatenated_string(selected_files)
             
             # Output result
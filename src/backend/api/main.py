@@ -1,17 +1,44 @@
+from contextlib import asynccontextmanager
+
 from routers.items import router as osv_vulnerabilities_router
-from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from osv.download_ecosystem_data import download_and_extract_all_ecosystems
+from osv.download_ecosystem_data import download_and_extract_all_ecosystems_async
 from osv.fetch_osv_ids import extract_vulnerability_ids
-from osv.osv_vuln_neo4j_loader import main as load_osv
-from osv.neo4j_connection import get_neo4j_driver
-from apscheduler.schedulers.background import BackgroundScheduler
+from osv.osv_vuln_neo4j_loader import load_ids_from_queue, create_indexes
+import asyncio
+
+from osv.neo4j_connection import get_neo4j_driver, close_neo4j_driver
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from routers.items.vulnerability_timeline import router as timeline_router
+from routers.items.queries import router as queries_router, clear_read_cache, warm_plan_cache
 from osv.vulnerability_repo_mapper import VulnerabilityRepoMapper
 from osv.vulnerability_repo_mapper import main as repo_mapper
-from typing import List
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled driver for the worker's lifetime, shared by every endpoint;
+    # index creation is idempotent, so running it at startup keeps the
+    # /search_by_name and loader queries index-backed from the first request
+    app.state.driver = get_neo4j_driver()
+    if app.state.driver is not None:
+        create_indexes(app.state.driver)
+        # Compile the canonical read plans now so the first request after a
+        # restart doesn't pay the parse+plan tax
+        warm_plan_cache(app.state.driver)
+    else:
+        # get_neo4j_driver returns None when Neo4j is down or still booting;
+        # start anyway and let endpoints fail per-request until it recovers
+        print("Neo4j unavailable at startup; skipping index creation and plan warm-up")
+    if not scheduler.running:
+        scheduler.start()
+    yield
+    scheduler.shutdown()
+    close_neo4j_driver()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],  # Vue.js frontend
@@ -22,161 +49,85 @@ app.add_middleware(
 
 app.include_router(osv_vulnerabilities_router, prefix="/items/osv_vulnerabilities", tags=["OSV_Vulnerabilities"])
 app.include_router(timeline_router, prefix="/items", tags=["vulnerability_timeline"])
+# No prefix so the existing /count_vulnerabilities, /last_updated, /search_* and
+# /minimal_versions paths stay where the frontend expects them
+app.include_router(queries_router, tags=["queries"])
 
 @app.get("/")
 def main():
     return "Hello from FastAPI!"
 
-@app.post("/update_osv_vulnerabilities")
-async def update_osv_vulnerabilities():
-    # Download and load vulnerabilities
-    download_and_extract_all_ecosystems()
-    extract_vulnerability_ids()
-    await load_osv()
-    
-    # Compute and store minimal affected versions
+def _compute_minimal_hitting_sets():
+    # Compute and store minimal affected versions (sync, CPU-heavy)
     mapper = VulnerabilityRepoMapper()
     if mapper.connect():
         try:
-            mapper.build_minimal_hitting_sets_per_package("OSV")
+            # The streaming export keeps the package snapshot in memory, so the
+            # hitting-set build consumes it directly instead of re-parsing the file
+            mapper.export_to_json_streaming()
+            mapper.build_minimal_hitting_sets_per_package(repo_name="OSV")
         except Exception as e:
             print(f"Error building minimal hitting sets: {e}")
         finally:
             mapper.close()
-    
+
+
+@app.post("/update_osv_vulnerabilities")
+async def update_osv_vulnerabilities():
+    # Producer/consumer pipeline: each ecosystem's ids go on the queue the
+    # moment its archive is scanned, so Neo4j ingestion overlaps the remaining
+    # downloads instead of starting after the last one finishes
+    ids_queue = asyncio.Queue()
+    await asyncio.gather(
+        download_and_extract_all_ecosystems_async(ids_queue=ids_queue),
+        load_ids_from_queue(ids_queue),
+    )
+    # Still write the combined id file for scripts that read it standalone;
+    # with the sidecars in place this is a cheap aggregation pass
+    await asyncio.to_thread(extract_vulnerability_ids)
+    await asyncio.to_thread(_compute_minimal_hitting_sets)
+    # The cached /count_vulnerabilities and /last_updated responses are stale now
+    clear_read_cache()
+
     return {"message": "OSV vulnerabilities updated successfully"}
 
 @app.post("/map_vulnerabilities")
 async def map_vulnerabilities():
-    repo_mapper()
-    
+    # Sync Neo4j work runs in a worker thread so it can't stall the event loop
+    await asyncio.to_thread(repo_mapper)
+
     return {"message": "map returned"}
 
+def _export_and_build_minimal_hitting_sets():
+    # Sync body of /compute_minimal_hitting_sets, run off the event loop
+    mapper = VulnerabilityRepoMapper()
+    try:
+        if mapper.connect():
+            mapper.export_to_json_streaming()
+            return mapper.build_minimal_hitting_sets_per_package(repo_name="OSV")
+        return None
+    finally:
+        mapper.close()
+
 # Add a new endpoint to manually trigger the minimal hitting set computation
 @app.post("/compute_minimal_hitting_sets")
 async def compute_minimal_hitting_sets():
-    mapper = VulnerabilityRepoMapper()
     try:
-        if mapper.connect():
-            result = mapper.build_minimal_hitting_sets_per_package("OSV")
-            return result
-        else:
+        result = await asyncio.to_thread(_export_and_build_minimal_hitting_sets)
+        if result is None:
             raise HTTPException(status_code=500, detail="Failed to connect to Neo4j database")
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
-    finally:
-        mapper.close()
 
-# Run script every week
-scheduler = BackgroundScheduler()
+# Run script every week (started/stopped by the lifespan handler).
+# AsyncIOScheduler awaits the coroutine on the server's event loop; the
+# thread-based scheduler would have called it, received a coroutine object,
+# and silently dropped it.
+scheduler = AsyncIOScheduler()
 scheduler.add_job(update_osv_vulnerabilities, "interval", weeks=1)
-scheduler.start()
-
-# Refactor eventually!
-# Query function to count Vulnerability nodes
-def count_vulnerability_nodes(driver):
-    with driver.session() as session:
-        result = session.run("MATCH (v:Vulnerability) RETURN count(v) AS total")
-        return result.single()["total"]
-
-# FastAPI endpoint to get vulnerability count
-@app.get("/count_vulnerabilities")
-async def get_vulnerability_count(driver=Depends(get_neo4j_driver)):
-    total = count_vulnerability_nodes(driver)
-    return {"total_vulnerabilities": total}
-
-
-# Query function to get the last_updated property
-def get_last_updated(driver):
-    with driver.session() as session:
-        result = session.run(
-            "MATCH (repo:VULN_REPO {name: 'OSV'}) RETURN repo.last_updated AS last_updated"
-        )
-        record = result.single()
-        return record["last_updated"] if record else None
-
-# FastAPI endpoint to return last_updated
-@app.get("/last_updated")
-async def fetch_last_updated(driver=Depends(get_neo4j_driver)):
-    last_updated = get_last_updated(driver)
-    if last_updated is None:
-        return {"error": "Repository not found"}
-    return {"last_updated": last_updated}
-
-###
-# Query function to query packages by name
-def search_packages_by_name(name: str, driver) -> List[dict]:
-    query = """
-    MATCH (p:Package)
-    WHERE toLower(p.name) CONTAINS toLower($name)
-    RETURN p.name AS packageName, p.ecosystem AS ecosystem
-    ORDER BY packageName, ecosystem
-    """
-    with driver.session() as session:
-        result = session.run(query, name=name)
-        return [record.data() for record in result]
-
-# FastAPI endpoint to get packages by name, this returns package and ecosystem.
-@app.get("/search_by_name")
-async def search_package_by_name(name: str = Query(..., description="Package name to search for"), driver=Depends(get_neo4j_driver)):
-    results = search_packages_by_name(name, driver)
-    return {"results": results}
-
-
-###
-# Query function to query vulnerabilities by package and ecosystem
-def get_vulnerabilities_by_package_and_ecosystem(package: str, ecosystem: str, driver) -> List[dict]:
-    query = """
-        MATCH (p:Package {name: $package, ecosystem: $ecosystem})<-[:AFFECTS]-(v:Vulnerability)
-        RETURN v.id AS VulnerabilityID, v.summary AS Summary, v.published AS PublishedDate
-    """
-    with driver.session() as session:
-        result = session.run(query, package=package, ecosystem=ecosystem)
-        return [record.data() for record in result]
-        
-# FastAPI endpoint to get packages by name, this returns package and ecosystem.
-@app.get("/search_vulnerabilities")
-async def search_vulnerabilities(
-    package: str = Query(..., description="Package name to search for"),
-    ecosystem: str = Query(..., description="Ecosystem of the package"),
-    driver=Depends(get_neo4j_driver)
-):
-    results = get_vulnerabilities_by_package_and_ecosystem(package, ecosystem, driver)
-    return {"results": results}
-
-
-
-
-
-###
-
-# New endpoint to get the minimal versions for a repository
-@app.get("/minimal_versions/{repo_name}")
-async def get_minimal_versions(repo_name: str, driver=Depends(get_neo4j_driver)):
-    try:
-        with driver.session() as session:
-            result = session.run(
-                "MATCH (repo:VULN_REPO {name: $repo_name}) "
-                "RETURN repo.minimal_versions AS minimal_versions, "
-                "repo.minimal_versions_count AS count, "
-                "repo.minimal_versions_updated AS updated",
-                repo_name=repo_name
-            )
-            record = result.single()
-            
-            if not record or not record["minimal_versions"]:
-                return {
-                    "message": f"No minimal versions found for {repo_name}. Try running /compute_minimal_hitting_sets first."
-                }
-                
-            return {
-                "repository": repo_name,
-                "minimal_versions": record["minimal_versions"],
-                "count": record["count"],
-                "last_updated": record["updated"]
-            }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error retrieving minimal versions: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,9 +1,21 @@
 import os
-import urllib.request
+import re
+import json
+import queue
+import orjson
+import asyncio
+import aiohttp
+import requests
 import concurrent.futures
+from requests.adapters import HTTPAdapter, Retry
 from zipfile import ZipFile
 import shutil  # For directory operations
 
+# Explicit download concurrency (also sizes the HTTP connection pool).
+# Bounded well below the ecosystem count so 32 concurrent multi-GB transfers
+# don't fight each other for network and disk queue depth.
+max_workers = 8
+
 # Base URL for downloading OSV data
 base_url = "https://osv-vulnerabilities.storage.googleapis.com/"
 
@@ -24,65 +36,288 @@ ecosystems = [
 #     "AlmaLinux",
 # ]
 
-# Function to download and extract new ecosystem data
-def download_and_extract(ecosystem):
+# Function to build one shared session with a pooled connection cache and retries,
+# so the HEAD size scan reuses keep-alive sockets instead of paying a TLS
+# handshake per request (archive downloads themselves run over aiohttp below)
+def make_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=max_workers,
+        pool_maxsize=max_workers,
+        max_retries=Retry(total=5, backoff_factor=0.5,
+                          status_forcelist=[429, 500, 502, 503, 504])
+    )
+    session.mount('https://', adapter)
+    return session
+
+# Function to scan every record id straight out of a ZIP archive with a pool of
+# workers. Downstream only ever needs the "id" field (the loader fetches full
+# records from the OSV API), so members are decompressed in memory and never
+# written out as individual files. Fixed-size buffers are borrowed from a
+# shared pool to avoid a fresh allocation per entry.
+def scan_zip_ids(zip_file_path):
+    workers = os.cpu_count() or 4
+
+    buffer_pool = queue.Queue()
+    for _ in range(workers):
+        buffer_pool.put(bytearray(64 * 1024))
+
+    with ZipFile(zip_file_path, 'r') as zip_ref:
+        def scan_one(info):
+            if info.is_dir() or not info.filename.endswith(".json"):
+                return None
+            buf = buffer_pool.get()
+            try:
+                with zip_ref.open(info) as src:
+                    # The id sits in a record's first bytes, so one chunk is
+                    # normally all that gets decompressed
+                    n = src.readinto(buf)
+                    match = ID_PATTERN.search(buf, 0, n)
+                    if match:
+                        return match.group(1).decode("utf-8")
+                    # Fall back to a full parse if the record is shaped unexpectedly
+                    with zip_ref.open(info) as whole:
+                        return orjson.loads(whole.read()).get("id")
+            except Exception as e:
+                print(f"Error scanning {info.filename}: {e}")
+                return None
+            finally:
+                buffer_pool.put(buf)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            return [vuln_id for vuln_id in executor.map(scan_one, zip_ref.infolist())
+                    if vuln_id]
+
+# Function to collect an archive's ids and swap the result into the final directory.
+# The individual record JSONs are never extracted: only the id sidecar survives,
+# which halves disk traffic and leaves nothing for later passes to re-read.
+# Returns the ids so pipeline callers can hand them downstream immediately.
+def finalize_ecosystem(ecosystem, temp_dir, zip_file_path):
+    vuln_ids = scan_zip_ids(zip_file_path)
+
+    # Write the id sidecar; fetch_osv_ids reads this directly
+    with open(os.path.join(temp_dir, ids_filename), "wb") as f:
+        for vuln_id in vuln_ids:
+            f.write(orjson.dumps(vuln_id))
+            f.write(b"\n")
+
+    # The archive has served its purpose; drop it before the directory swap
+    os.remove(zip_file_path)
+
+    # Define the final ecosystem directory
+    final_dir = os.path.join(download_dir, ecosystem)
+
+    # If the final directory exists, remove it
+    if os.path.exists(final_dir):
+        shutil.rmtree(final_dir)
+
+    # Rename the temporary directory to the final ecosystem directory
+    os.rename(temp_dir, final_dir)
+
+    return vuln_ids
+
+# Cached archive sizes, used to order downloads largest-first
+sizes_file = os.path.join(download_dir, "ecosystem_sizes.json")
+
+# Per-ecosystem id sidecar written during extraction (NDJSON, one id per line).
+# fetch_osv_ids reads this instead of re-opening every extracted record.
+ids_filename = "vulnerability_ids.ndjson"
+
+# Mirrors fetch_osv_ids.ID_PATTERN: the "id" field sits in a record's first bytes
+ID_PATTERN = re.compile(rb'"id"\s*:\s*"([^"]+)"')
+
+# Validators from the last successful sync, keyed by ecosystem. A conditional
+# request against these lets GCS answer 304 Not Modified in one round-trip
+# instead of re-serving a multi-MB archive that hasn't changed.
+etags_file = os.path.join(download_dir, "etags.json")
+
+def _load_etags():
+    try:
+        with open(etags_file, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def _save_etag(ecosystem, etag, last_modified):
+    etags = _load_etags()
+    etags[ecosystem] = {"etag": etag, "last_modified": last_modified}
+    with open(etags_file, 'w') as f:
+        json.dump(etags, f)
+
+def _read_sidecar_ids(ecosystem):
+    """Read the ids recorded by a previous sync of this ecosystem."""
+    path = os.path.join(download_dir, ecosystem, ids_filename)
+    with open(path, "rb") as f:
+        return [orjson.loads(line) for line in f if line.strip()]
+
+# Function to load per-ecosystem archive sizes, HEAD-ing any we haven't seen yet
+def get_ecosystem_sizes(session):
     try:
-        print(f"Starting synchronization for {ecosystem}...")
-        
-        ecosystem = ecosystem.replace(" ", "%20")
-        # URL for downloading the ecosystem data
-        url = f"{base_url}{ecosystem}/all.zip"
-        
-        # Create a temporary directory for this update
-        temp_dir = os.path.join(download_dir, f"{ecosystem}_temp")
-        os.makedirs(temp_dir, exist_ok=True)
-
-        # Path for the downloaded ZIP file
-        zip_file_path = os.path.join(temp_dir, f"{ecosystem}_vulnerabilities.zip")
-        
+        with open(sizes_file, 'r') as f:
+            sizes = json.load(f)
+    except Exception:
+        sizes = {}
+
+    missing = [ecosystem for ecosystem in ecosystems if ecosystem not in sizes]
+    for ecosystem in missing:
+        url = f"{base_url}{ecosystem.replace(' ', '%20')}/all.zip"
+        try:
+            head = session.head(url, timeout=30, headers={"Accept-Encoding": "identity"})
+            sizes[ecosystem] = int(head.headers.get("Content-Length", 0))
+        except Exception:
+            sizes[ecosystem] = 0
+
+    if missing:
+        with open(sizes_file, 'w') as f:
+            json.dump(sizes, f)
+
+    return sizes
+
+# Coroutine to stream one archive to disk over aiohttp, resuming a partial if possible
+async def fetch_zip_async(session, url, zip_file_path):
+    part_path = zip_file_path + ".part"
+    meta_path = zip_file_path + ".meta.json"
+
+    headers = {"Accept-Encoding": "identity"}
+    have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if have > 0:
         try:
-            # Download using urllib instead of requests
-            with urllib.request.urlopen(url) as response:
-                content = response.read()
-                
-            # Save the content to the ZIP file
-            with open(zip_file_path, 'wb') as f:
-                f.write(content)
-                
-            print(f"Download complete for {ecosystem}. Extracting...")
-
-            # Extract the ZIP file to the temporary directory
-            with ZipFile(zip_file_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-
-            # Define the final ecosystem directory
-            final_dir = os.path.join(download_dir, ecosystem)
-
-            # If the final directory exists, remove it
-            if os.path.exists(final_dir):
-                shutil.rmtree(final_dir)
-
-            # Rename the temporary directory to the final ecosystem directory
-            os.rename(temp_dir, final_dir)
-            print(f"Synchronization complete for {ecosystem}.")
-        except urllib.error.HTTPError as e:
-            print(f"Failed to download {ecosystem}, HTTP error: {e.code}")
-            shutil.rmtree(temp_dir)
-        except urllib.error.URLError as e:
-            print(f"Failed to download {ecosystem}, URL error: {e.reason}")
-            shutil.rmtree(temp_dir)
-
-    except Exception as e:
-        print(f"Error synchronizing {ecosystem}: {e}")
-        # Clean up the temporary directory in case of error
-        temp_dir = os.path.join(download_dir, f"{ecosystem}_temp")
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
-
-# Function to download and extract all ecosystems in parallel
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+        except Exception:
+            meta = {}
+        validator = meta.get("etag") or meta.get("last_modified")
+        if validator:
+            headers["Range"] = f"bytes={have}-"
+            headers["If-Range"] = validator
+
+    async with session.get(url, headers=headers) as response:
+        response.raise_for_status()
+        mode = 'ab' if response.status == 206 else 'wb'
+
+        with open(meta_path, 'w') as f:
+            json.dump({"etag": response.headers.get("ETag"),
+                       "last_modified": response.headers.get("Last-Modified")}, f)
+
+        with open(part_path, mode) as f:
+            async for chunk in response.content.iter_chunked(1 << 20):
+                f.write(chunk)
+
+    os.replace(part_path, zip_file_path)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    # Hand the validators back so a successful sync can remember them
+    return response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+# Coroutine to download and extract one ecosystem on the event loop. The ZipFile
+# work is CPU-bound, so it is offloaded to a thread and never blocks the loop.
+async def download_and_extract_async(session, semaphore, ecosystem, ids_queue=None):
+    async def report_failure(ecosystem):
+        """Keep the consumer's id bookkeeping honest when a download fails.
+
+        The previous sync's sidecar ids stand in for the unreachable archive so
+        its vulnerabilities aren't treated as obsolete and bulk-deleted; with
+        no sidecar either, a (None, False) marker tells the consumer the id
+        set is incomplete and the removal pass must be skipped.
+        """
+        if ids_queue is None:
+            return
+        try:
+            vuln_ids = await asyncio.to_thread(_read_sidecar_ids, ecosystem)
+        except OSError:
+            vuln_ids = None
+        await ids_queue.put((vuln_ids or None, False))
+
+    async with semaphore:
+        try:
+            print(f"Starting synchronization for {ecosystem}...")
+
+            ecosystem = ecosystem.replace(" ", "%20")
+            url = f"{base_url}{ecosystem}/all.zip"
+
+            # Conditional probe: when we synced this archive before, ask the
+            # server whether it changed. A 304 costs one round-trip and skips
+            # the whole download; the ids from the previous sync still feed the
+            # pipeline so downstream bookkeeping sees the complete id set.
+            prior = _load_etags().get(ecosystem)
+            sidecar_path = os.path.join(download_dir, ecosystem, ids_filename)
+            if prior and os.path.exists(sidecar_path):
+                cond = {"Accept-Encoding": "identity"}
+                if prior.get("etag"):
+                    cond["If-None-Match"] = prior["etag"]
+                if prior.get("last_modified"):
+                    cond["If-Modified-Since"] = prior["last_modified"]
+                try:
+                    async with session.head(url, headers=cond) as probe:
+                        if probe.status == 304:
+                            print(f"{ecosystem} unchanged upstream (304), skipping download.")
+                            if ids_queue is not None:
+                                vuln_ids = await asyncio.to_thread(_read_sidecar_ids, ecosystem)
+                                if vuln_ids:
+                                    await ids_queue.put((vuln_ids, False))
+                            return
+                except aiohttp.ClientError:
+                    pass  # probe failed; fall through to the normal download
+
+            temp_dir = os.path.join(download_dir, f"{ecosystem}_temp")
+            os.makedirs(temp_dir, exist_ok=True)
+
+            zip_file_path = os.path.join(temp_dir, f"{ecosystem}_vulnerabilities.zip")
+
+            try:
+                etag, last_modified = await fetch_zip_async(session, url, zip_file_path)
+                print(f"Download complete for {ecosystem}. Extracting...")
+
+                vuln_ids = await asyncio.to_thread(finalize_ecosystem, ecosystem, temp_dir, zip_file_path)
+                print(f"Synchronization complete for {ecosystem}.")
+
+                # Only a fully extracted archive earns its validators a slot
+                _save_etag(ecosystem, etag, last_modified)
+
+                # Hand this ecosystem's ids straight to the loader stage so
+                # Neo4j ingestion overlaps the remaining downloads
+                if ids_queue is not None and vuln_ids:
+                    await ids_queue.put((vuln_ids, True))
+            except aiohttp.ClientResponseError as e:
+                print(f"Failed to download {ecosystem}, HTTP error: {e.status}")
+                shutil.rmtree(temp_dir)
+                await report_failure(ecosystem)
+            except aiohttp.ClientError as e:
+                # Keep the temp directory: the .part file lets the next run resume
+                print(f"Failed to download {ecosystem}, request error: {e} (partial kept for resume)")
+                await report_failure(ecosystem)
+
+        except Exception as e:
+            print(f"Error synchronizing {ecosystem}: {e}")
+            temp_dir = os.path.join(download_dir, f"{ecosystem}_temp")
+            if os.path.exists(temp_dir):
+                shutil.rmtree(temp_dir)
+            await report_failure(ecosystem)
+
+# Coroutine to synchronize every ecosystem: one connection pool drives all in-flight
+# sockets from a single thread instead of paying a thread per download. Large
+# ecosystems start first so a giant archive picked up last doesn't dominate tail latency.
+async def download_and_extract_all_ecosystems_async(ids_queue=None):
+    # The HEAD scan uses blocking requests I/O; run it off-loop so an awaiting
+    # server (e.g. the FastAPI endpoint) stays responsive during the probe
+    sizes = await asyncio.to_thread(get_ecosystem_sizes, make_session())
+    ordered = sorted(ecosystems, key=lambda ecosystem: -sizes.get(ecosystem, 0))
+
+    semaphore = asyncio.Semaphore(max_workers)
+    connector = aiohttp.TCPConnector(limit=max_workers, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=60, sock_read=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await asyncio.gather(*(download_and_extract_async(session, semaphore, ecosystem, ids_queue)
+                               for ecosystem in ordered))
+
+    # Sentinel tells the consuming stage that no more id batches are coming
+    if ids_queue is not None:
+        await ids_queue.put(None)
+
+# Synchronous entry point for callers that are not already on an event loop
 def download_and_extract_all_ecosystems():
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        executor.map(download_and_extract, ecosystems)
+    asyncio.run(download_and_extract_all_ecosystems_async())
 
 # Run the script
 if __name__ == "__main__":
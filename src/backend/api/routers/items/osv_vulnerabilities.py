@@ -1,6 +1,5 @@
 from fastapi import APIRouter, HTTPException, Query
 from  models.vulnerability import Vulnerability
-from drivers.neo4j_driver import driver 
 from osv.download_ecosystem_data import download_and_extract_all_ecosystems
 #from osv.fetch_osv_ids import 
 router = APIRouter()
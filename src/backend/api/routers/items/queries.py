@@ -0,0 +1,269 @@
+import functools
+import hashlib
+import re
+
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from neo4j import RoutingControl
+from typing import List
+
+from osv.neo4j_connection import get_neo4j_driver
+
+router = APIRouter()
+
+# The data behind these reads only changes when the weekly update pipeline
+# runs, so an hour-long in-process cache turns the common case from a Bolt
+# round-trip into a dict lookup. Per-process only; a shared store (redis)
+# would be needed if the API ever runs multi-worker.
+_read_cache = TTLCache(maxsize=128, ttl=3600)
+
+# Typeahead UIs call /search_by_name on every keystroke, so recent prefixes
+# repeat constantly. Short TTL bounds staleness, maxsize bounds memory.
+_search_cache = TTLCache(maxsize=1024, ttl=300)
+
+# Vulnerability pages keyed by (package, ecosystem, limit, offset); pagination
+# means browsing one package fans out over many keys, hence the larger maxsize
+_vuln_page_cache = TTLCache(maxsize=1024, ttl=3600)
+
+
+def clear_read_cache():
+    """Drop cached read responses; called when the update pipeline finishes."""
+    _read_cache.clear()
+    _search_cache.clear()
+    _vuln_page_cache.clear()
+
+
+def _respond_conditional(payload, request: Request, response: Response):
+    """Attach ETag/Cache-Control validators and 304 matching If-None-Match.
+
+    A short max-age lets clients and proxies skip the round trip entirely;
+    after it expires a matching ETag still turns the request into a bodyless
+    304 instead of a re-serialized payload.
+    """
+    etag = '"%s"' % hashlib.blake2b(repr(payload).encode(), digest_size=8).hexdigest()
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "public, max-age=30"
+    return payload
+
+
+# Canonical read statements, parameterized exactly as the endpoints issue them
+# so the warm-up compiles the same plans the first real requests will reuse.
+CANONICAL_QUERIES = [
+    ("MATCH (v:Vulnerability) RETURN count(v) AS total", {}),
+    ("MATCH (repo:VULN_REPO {name: 'OSV'}) RETURN repo.last_updated AS last_updated", {}),
+    (
+        "CALL db.index.fulltext.queryNodes('package_name_ft', $q) YIELD node AS p "
+        "RETURN p.name AS packageName, p.ecosystem AS ecosystem "
+        "ORDER BY packageName, ecosystem LIMIT 20",
+        {"q": "*warmup*"},
+    ),
+    (
+        "MATCH (p:Package {name: $package, ecosystem: $ecosystem})<-[:AFFECTS]-(v:Vulnerability) "
+        "RETURN v.id AS VulnerabilityID, v.summary AS Summary, v.published AS PublishedDate",
+        {"package": "warmup", "ecosystem": "warmup"},
+    ),
+    (
+        "MATCH (repo:VULN_REPO {name: $repo_name}) "
+        "RETURN repo.minimal_versions AS minimal_versions, "
+        "repo.minimal_versions_count AS count, "
+        "repo.minimal_versions_updated AS updated",
+        {"repo_name": "warmup"},
+    ),
+]
+
+
+def warm_plan_cache(driver):
+    """Pre-compile the canonical read queries so the first real request after
+    a restart pays warm-path latency instead of parse+plan."""
+    try:
+        # Roomier query plan cache, when the connecting user may change config
+        driver.execute_query("CALL dbms.setConfigValue('dbms.query_cache_size', '256')")
+    except Exception:
+        pass  # unprivileged user or config not dynamic; the default cache still works
+    for query, params in CANONICAL_QUERIES:
+        try:
+            driver.execute_query(query, params, database_="neo4j", routing_=RoutingControl.READ)
+        except Exception as e:
+            print(f"Plan cache warm-up query failed: {e}")
+
+
+def _cached(func):
+    """Cache an endpoint's response under its function name until TTL expiry."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = func.__name__
+        try:
+            return _read_cache[key]
+        except KeyError:
+            pass
+        response = func(*args, **kwargs)
+        _read_cache[key] = response
+        return response
+    return wrapper
+
+
+def get_driver(request: Request):
+    # Shared pooled driver created by the lifespan handler in main.py. If
+    # Neo4j was down at startup the lifespan stored None; retry here so the
+    # API recovers as soon as the database comes up, without a restart.
+    if request.app.state.driver is None:
+        request.app.state.driver = get_neo4j_driver()
+        if request.app.state.driver is None:
+            raise HTTPException(status_code=503, detail="Neo4j is unavailable")
+    return request.app.state.driver
+
+
+# Query function to count Vulnerability nodes. execute_query reuses the
+# driver's pooled connections and routes to a follower in a cluster, so
+# single-statement reads skip the explicit session setup entirely.
+def count_vulnerability_nodes(driver):
+    result = driver.execute_query(
+        "MATCH (v:Vulnerability) RETURN count(v) AS total",
+        database_="neo4j",
+        routing_=RoutingControl.READ,
+    )
+    return result.records[0]["total"]
+
+# FastAPI endpoint to get vulnerability count. Plain 'def' so FastAPI runs
+# the blocking Bolt I/O in its threadpool instead of on the event loop.
+@_cached
+def _count_payload(driver):
+    return {"total_vulnerabilities": count_vulnerability_nodes(driver)}
+
+@router.get("/count_vulnerabilities")
+def get_vulnerability_count(request: Request, response: Response, driver=Depends(get_driver)):
+    return _respond_conditional(_count_payload(driver), request, response)
+
+
+# Query function to get the last_updated property
+def get_last_updated(driver):
+    result = driver.execute_query(
+        "MATCH (repo:VULN_REPO {name: 'OSV'}) RETURN repo.last_updated AS last_updated",
+        database_="neo4j",
+        routing_=RoutingControl.READ,
+    )
+    return result.records[0]["last_updated"] if result.records else None
+
+# FastAPI endpoint to return last_updated
+@router.get("/last_updated")
+@_cached
+def fetch_last_updated(driver=Depends(get_driver)):
+    last_updated = get_last_updated(driver)
+    if last_updated is None:
+        return {"error": "Repository not found"}
+    return {"last_updated": last_updated}
+
+###
+# Lucene query syntax characters; package names like @babel/core or c++ hit
+# these constantly and must match literally, not parse as operators
+_LUCENE_SPECIALS = re.compile(r'(&&|\|\||[+\-!(){}[\]^"~*?:\\/])')
+
+def _escape_lucene(term: str) -> str:
+    """Backslash-escape Lucene operators so user input matches literally."""
+    return _LUCENE_SPECIALS.sub(r"\\\1", term)
+
+# Query function to query packages by name. Uses the package_name_ft full-text
+# index (created at startup) so the lookup is a Lucene probe instead of a
+# label scan running toLower on every Package node.
+def search_packages_by_name(name: str, driver) -> List[dict]:
+    # LIMIT 20 keeps a one-letter prefix from streaming thousands of rows
+    query = """
+    CALL db.index.fulltext.queryNodes('package_name_ft', $q) YIELD node AS p
+    RETURN p.name AS packageName, p.ecosystem AS ecosystem
+    ORDER BY packageName, ecosystem
+    LIMIT 20
+    """
+    # Coalesce repeated keystroke queries on the normalised full name; the
+    # TTLCache maxsize already bounds memory, so no need to truncate the key
+    key = name.lower()
+    try:
+        return _search_cache[key]
+    except KeyError:
+        pass
+    # Wildcards on both sides keep the old substring-match behavior; the term
+    # itself is escaped so names containing Lucene operators match literally
+    result = driver.execute_query(
+        query, q=f"*{_escape_lucene(name)}*", database_="neo4j", routing_=RoutingControl.READ
+    )
+    results = [record.data() for record in result.records]
+    _search_cache[key] = results
+    return results
+
+# FastAPI endpoint to get packages by name, this returns package and ecosystem.
+@router.get("/search_by_name")
+def search_package_by_name(name: str = Query(..., description="Package name to search for"), driver=Depends(get_driver)):
+    results = search_packages_by_name(name, driver)
+    return {"results": results}
+
+
+###
+# Query function to query vulnerabilities by package and ecosystem. SKIP/LIMIT
+# run server-side, so the driver only ships one page over Bolt instead of the
+# package's full vulnerability table.
+def get_vulnerabilities_by_package_and_ecosystem(package: str, ecosystem: str, driver,
+                                                 limit: int = 100, offset: int = 0) -> List[dict]:
+    query = """
+        MATCH (p:Package {name: $package, ecosystem: $ecosystem})<-[:AFFECTS]-(v:Vulnerability)
+        RETURN v.id AS VulnerabilityID, v.summary AS Summary, v.published AS PublishedDate
+        ORDER BY VulnerabilityID
+        SKIP $offset LIMIT $limit
+    """
+    result = driver.execute_query(
+        query, package=package, ecosystem=ecosystem, limit=limit, offset=offset,
+        database_="neo4j", routing_=RoutingControl.READ,
+    )
+    return [record.data() for record in result.records]
+
+# FastAPI endpoint to get packages by name, this returns package and ecosystem.
+@router.get("/search_vulnerabilities")
+def search_vulnerabilities(
+    request: Request,
+    response: Response,
+    package: str = Query(..., description="Package name to search for"),
+    ecosystem: str = Query(..., description="Ecosystem of the package"),
+    limit: int = Query(100, ge=1, le=1000, description="Page size"),
+    offset: int = Query(0, ge=0, description="Rows to skip"),
+    driver=Depends(get_driver)
+):
+    key = (package, ecosystem, limit, offset)
+    try:
+        payload = _vuln_page_cache[key]
+    except KeyError:
+        results = get_vulnerabilities_by_package_and_ecosystem(package, ecosystem, driver, limit, offset)
+        payload = {"results": results, "limit": limit, "offset": offset}
+        _vuln_page_cache[key] = payload
+    return _respond_conditional(payload, request, response)
+
+
+###
+
+# New endpoint to get the minimal versions for a repository
+@router.get("/minimal_versions/{repo_name}")
+def get_minimal_versions(repo_name: str, driver=Depends(get_driver)):
+    try:
+        result = driver.execute_query(
+            "MATCH (repo:VULN_REPO {name: $repo_name}) "
+            "RETURN repo.minimal_versions AS minimal_versions, "
+            "repo.minimal_versions_count AS count, "
+            "repo.minimal_versions_updated AS updated",
+            repo_name=repo_name,
+            database_="neo4j",
+            routing_=RoutingControl.READ,
+        )
+        record = result.records[0] if result.records else None
+
+        if not record or not record["minimal_versions"]:
+            return {
+                "message": f"No minimal versions found for {repo_name}. Try running /compute_minimal_hitting_sets first."
+            }
+
+        return {
+            "repository": repo_name,
+            "minimal_versions": record["minimal_versions"],
+            "count": record["count"],
+            "last_updated": record["updated"]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving minimal versions: {str(e)}")
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
-from neo4j_driver import driver, Neo4jDriver
+from neo4j_driver import Neo4jDriver
 import logging
 
 class VulnerabilityRepository(BaseModel):
@@ -11,7 +11,7 @@ class VulnerabilityRepository(BaseModel):
 #this is currently not functional
 def create_repository_in_neo4j(repo: VulnerabilityRepository):
     try:
-        with Neo4jDriver.get_driver().session() as session:
+        with Neo4jDriver.session() as session:
             query = """
             CREATE (r:Repository {
                 name: $name, 
@@ -46,7 +46,7 @@ def create_repository_in_neo4j(repo: VulnerabilityRepository):
 
 def update_repository_in_neo4j(repo: VulnerabilityRepository):
     """Updates an existing VulnerabilityRepository node in Neo4j."""
-    with driver.session() as session:
+    with Neo4jDriver.session() as session:
         query = """
         MATCH (r:VulnerabilityRepository {name: $name})
         SET r.last_updated = $last_updated
@@ -56,7 +56,7 @@ def update_repository_in_neo4j(repo: VulnerabilityRepository):
 
 def repository_exists_in_neo4j(repo: VulnerabilityRepository) -> bool:
     """Checks if a VulnerabilityRepository exists in Neo4j."""
-    with driver.session() as session:
+    with Neo4jDriver.session() as session:
         query = """
         MATCH (r:VulnerabilityRepository {name: $name})
         RETURN COUNT(r) > 0 AS exists
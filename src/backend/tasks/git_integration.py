@@ -0,0 +1,219 @@
+# src/backend/api/tasks/git_integration.py
+#
+# Helpers for run_git_linguist.py and the version builder: resolve a package
+# to its git repository, materialize it at one revision, and run
+# github-linguist over the checkout.
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import quote
+
+import requests
+from packageurl import PackageURL
+
+try:
+    import orjson  # Rust-backed JSON, much faster than the stdlib on decode
+except ImportError:
+    orjson = None
+
+# Bare hex of plausible length → commit SHA, anything else → tag/branch name
+_SHA_RE = re.compile(r"[0-9a-f]{7,40}")
+
+# Long-lived per-repo workspaces: one blobless clone per URL, reused across
+# calls so inspecting N revisions of the same repo costs one clone, not N.
+# Bounded LRU so a long run over many repos can't fill the disk.
+_MAX_WORKSPACES = int(os.getenv("GIT_WORKSPACE_CACHE_SIZE", "20"))
+_WORKSPACES: "OrderedDict[str, tuple[Path, threading.Lock]]" = OrderedDict()
+_WORKSPACES_GUARD = threading.Lock()
+_WORKSPACE_ROOT = Path(os.getenv("GIT_WORKSPACE_DIR",
+                                 os.path.join(tempfile.gettempdir(), "git_linguist_cache")))
+
+
+class _NoopCleanup:
+    """Stands in for TemporaryDirectory so existing callers' tmp.cleanup() is harmless."""
+
+    def cleanup(self):
+        pass
+
+
+def _run_git(args, cwd=None):
+    # Progress output from clone/fetch can run to megabytes on big repos;
+    # drop it instead of buffering it
+    subprocess.run(["git"] + args, cwd=cwd, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _normalize_git_url(raw_url: str) -> str | None:
+    """
+    Turn things like
+      git+https://github.com/foo/bar.git
+      git+ssh://git@github.com/foo/bar.git
+      git@github.com:foo/bar.git
+    into
+      https://github.com/foo/bar.git
+    """
+    if not raw_url:
+        return None
+
+    # strip any leading "git+"
+    url = raw_url.removeprefix("git+")
+
+    # git@github.com:owner/repo.git  →  https://github.com/owner/repo.git
+    if url.startswith("git@"):
+        host, path = url[len("git@"):].split(":", 1)
+        return f"https://{host}/{path}"
+
+    # ssh://git@github.com/owner/repo.git  →  https://github.com/owner/repo.git
+    if url.startswith("ssh://git@"):
+        rest = url[len("ssh://git@"):]
+        return f"https://{rest}"
+
+    # git://github.com/foo/bar.git  →  https://github.com/foo/bar.git
+    if url.startswith("git://"):
+        rest = url[len("git://"):]
+        return f"https://{rest}"
+
+    # already http[s]?
+    if url.startswith("http://") or url.startswith("https://"):
+        # ensure .git on the end
+        if not url.endswith(".git"):
+            url = url.rstrip("/") + ".git"
+        return url
+
+    return None
+
+
+def _npm_repo_url(purl: PackageURL) -> str | None:
+    name = f"{purl.namespace}/{purl.name}" if purl.namespace else purl.name
+    encoded = quote(name, safe='')
+    try:
+        r = requests.get(f"https://registry.npmjs.org/{encoded}", timeout=10)
+        r.raise_for_status()
+        repo = r.json().get("repository") or {}
+        url = repo.get("url", "")
+        return _normalize_git_url(url)
+    except Exception:
+        return None
+
+
+def _pypi_repo_url(purl: PackageURL) -> str | None:
+    try:
+        r = requests.get(f"https://pypi.org/pypi/{purl.name}/json", timeout=10)
+        r.raise_for_status()
+        info = r.json().get("info", {})
+        urls = info.get("project_urls") or {}
+        raw = urls.get("Source") or urls.get("Homepage") or info.get("home_page", "")
+        return _normalize_git_url(raw)
+    except Exception:
+        return None
+
+
+def git_url_from_purl(purl_str: str) -> str | None:
+    """Resolve a package URL to a cloneable https git URL, or None."""
+    try:
+        purl = PackageURL.from_string(purl_str)
+    except Exception:
+        return None
+
+    # GitHub / GitLab / Bitbucket
+    if purl.type in {"github", "gitlab", "bitbucket"} and purl.namespace and purl.name:
+        return f"https://{purl.type}.com/{purl.namespace}/{purl.name}.git"
+
+    # npm
+    if purl.type == "npm":
+        return _npm_repo_url(purl)
+
+    # PyPI
+    if purl.type in {"pypi", "python"}:
+        return _pypi_repo_url(purl)
+
+    # composer → assume GitHub
+    if purl.type == "composer" and purl.namespace and purl.name:
+        return f"https://github.com/{purl.namespace}/{purl.name}.git"
+
+    return None
+
+
+def _workspace_for(repo_url: str):
+    """Return (path, lock) for repo_url's workspace, evicting the LRU entry if full."""
+    with _WORKSPACES_GUARD:
+        if repo_url in _WORKSPACES:
+            _WORKSPACES.move_to_end(repo_url)
+            return _WORKSPACES[repo_url], True
+        while len(_WORKSPACES) >= _MAX_WORKSPACES:
+            # Only evict a workspace whose per-repo lock is free: a holder may
+            # be mid-fetch/switch inside the directory, and deleting it under
+            # a live git process corrupts the checkout it is producing
+            evicted = False
+            for old_url, (old_path, old_lock) in list(_WORKSPACES.items()):
+                if old_lock.acquire(blocking=False):
+                    try:
+                        del _WORKSPACES[old_url]
+                        shutil.rmtree(old_path, ignore_errors=True)
+                    finally:
+                        old_lock.release()
+                    evicted = True
+                    break
+            if not evicted:
+                # Every candidate is busy; run over the cap rather than
+                # delete a directory out from under an active caller
+                break
+        path = _WORKSPACE_ROOT / re.sub(r"[^A-Za-z0-9._-]", "_", repo_url)
+        entry = (path, threading.Lock())
+        _WORKSPACES[repo_url] = entry
+        return entry, False
+
+
+def git_switch_revision(repo_url: str, revision: str):
+    """
+    Check out `revision` of `repo_url` in that repo's cached workspace.
+
+    Returns (repo_path, tmp); tmp.cleanup() is kept for caller compatibility
+    but is a no-op — the workspace stays warm for the next revision and is
+    only removed on LRU eviction.
+
+    The first call per URL does one blobless partial clone; later calls just
+    refresh refs and switch, fetching only the blobs the new tree needs.
+    """
+    (repo_path, lock), _ = _workspace_for(repo_url)
+    with lock:
+        if not (repo_path / ".git").exists():
+            repo_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.rmtree(repo_path, ignore_errors=True)
+            # --no-tags: only the revision asked for is fetched below, so the
+            # repo's full tag namespace never transfers or gets advertised
+            _run_git(["clone", "--filter=blob:none", "--no-tags",
+                      "--no-checkout", repo_url, str(repo_path)])
+        if _SHA_RE.fullmatch(revision):
+            # The SHA may not be reachable from any advertised ref; fetch it directly
+            _run_git(["fetch", "--no-tags", repo_url, revision], cwd=repo_path)
+            _run_git(["switch", "--detach", "FETCH_HEAD"], cwd=repo_path)
+        else:
+            try:
+                # One explicit refspec instead of refreshing every tag
+                _run_git(["fetch", "--no-tags", "origin",
+                          f"refs/tags/{revision}:refs/tags/{revision}"],
+                         cwd=repo_path)
+                _run_git(["switch", "--detach", revision], cwd=repo_path)
+            except subprocess.CalledProcessError:
+                # Branch name rather than a tag: fetch it by name and detach
+                # onto FETCH_HEAD like the SHA path — switch --detach can't
+                # take a remote-only branch name directly
+                _run_git(["fetch", "--no-tags", "origin", revision], cwd=repo_path)
+                _run_git(["switch", "--detach", "FETCH_HEAD"], cwd=repo_path)
+    return str(repo_path), _NoopCleanup()
+
+
+def get_github_linguist_metadata(repo_path: str) -> dict:
+    """Run github-linguist on a checkout and return its {language: stats} JSON."""
+    out = subprocess.check_output(["github-linguist", "--json", repo_path],
+                                  stderr=subprocess.DEVNULL)
+    # check_output returns bytes, which orjson decodes directly
+    return orjson.loads(out) if orjson is not None else json.loads(out)
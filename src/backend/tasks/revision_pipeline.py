@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from .run_version_builder import run_once
 
@@ -12,3 +13,11 @@ def run_revision_pipeline() -> str:
     out = run_once()
     log.info("Revision pipeline complete, output saved to %s", out)
     return out
+
+async def run_revision_pipeline_async() -> str:
+    """
+    Event-loop-safe wrapper: the build fans out across a process pool but the
+    coordinating run() call still blocks, so async callers (FastAPI handlers,
+    scheduler jobs) run it in a worker thread to keep the loop free.
+    """
+    return await asyncio.to_thread(run_revision_pipeline)
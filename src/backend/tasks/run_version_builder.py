@@ -7,7 +7,6 @@ $ python -m src.backend.api.tasks.run_version_builder
 import os
 import time
 import logging
-import multiprocessing as mp
 from pathlib import Path
 from version_builder.builder import VersionBuilder
 
@@ -18,7 +17,7 @@ def run_once() -> str:
     if not JSON_FILE.exists():
         raise FileNotFoundError(f"expected JSON not found → {JSON_FILE}")
 
-    workers = mp.cpu_count() or 4
+    workers = os.cpu_count() or 4
     log = logging.getLogger(__name__)
     log.info("▶️ VersionBuilder starting on %s with %d workers", JSON_FILE.name, workers)
 
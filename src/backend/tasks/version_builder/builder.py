@@ -0,0 +1,660 @@
+"""
+VersionBuilder
+
+Reads the minimal-sets JSON produced by the hitting-set pipeline, checks out each
+(package, version) from its upstream git repository, runs github-linguist on the
+checkout, and persists one Version snapshot per (repo, tag) to Neo4j.
+
+Run via src/backend/tasks/run_version_builder.py inside the FastAPI container.
+Pass output_dir to emit a JSON report instead of writing to Neo4j.
+"""
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from neo4j import GraphDatabase
+
+try:
+    import ijson  # incremental JSON parsing for the multi-hundred-MB snapshot
+except ImportError:
+    ijson = None
+
+try:
+    import enry  # in-process linguist port (Go library with Python bindings)
+except ImportError:
+    enry = None
+
+try:
+    import orjson  # Rust-backed JSON, ~3x faster decode than the stdlib
+except ImportError:
+    orjson = None
+
+try:
+    # Shared purl → git URL resolver (forge purls map directly; npm/PyPI go
+    # through their registries). Guarded so environments missing packageurl/
+    # requests can still run on inputs that carry explicit repo_url keys.
+    from git_integration import git_url_from_purl
+except ImportError:
+    git_url_from_purl = None
+
+log = logging.getLogger(__name__)
+
+
+def _json_loads(data):
+    """Decode JSON from str or bytes with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, bytes):
+        data = data.decode()
+    return json.loads(data)
+
+
+def _json_dumps(obj):
+    """Encode JSON to str with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USERNAME = os.getenv("NEO4J_USERNAME", "neo4j")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "")
+
+# How many pending version snapshots to buffer before shipping one UNWIND write;
+# operator-tunable so deployments can trade memory for fewer commits
+FLUSH_EVERY = int(os.getenv("VERSION_BUILDER_BATCH_SIZE", "500"))
+
+# Single UNWIND over all buffered rows: one parse/plan and one commit per batch
+# instead of one implicit transaction per (repo, tag) snapshot. Used as-is when
+# APOC is absent; with APOC the write splits into the two statements below.
+SNAPSHOT_QUERY = """
+UNWIND $rows AS row
+MERGE (r:CodeRepo {url: row.url})
+MERGE (v:Version {tag: row.tag, commit: row.commit})
+SET v.languages = row.languages_json,
+    v.analyzed = timestamp()
+MERGE (r)-[:HAS_VERSION]->(v)
+WITH v, row
+UNWIND row.cves AS cve
+MATCH (vuln:Vulnerability {id: cve})
+MERGE (vuln)-[:AFFECTS_VERSION]->(v)
+"""
+
+# APOC split, phase 1: node merges stay one small transaction per batch
+NODE_MERGE_QUERY = """
+UNWIND $rows AS row
+MERGE (r:CodeRepo {url: row.url})
+MERGE (v:Version {tag: row.tag, commit: row.commit})
+SET v.languages = row.languages_json,
+    v.analyzed = timestamp()
+MERGE (r)-[:HAS_VERSION]->(v)
+"""
+
+# APOC split, phase 2: vulnerability links fan out much wider than the node
+# rows (one per cve per version), so periodic.iterate commits them in server-
+# side chunks and parallelizes across its own workers; a failed chunk retries
+# and re-executes only itself instead of the whole batch
+VULN_LINK_QUERY = """
+CALL apoc.periodic.iterate(
+  "UNWIND $rows AS row UNWIND row.cves AS cve
+   RETURN row.tag AS tag, row.commit AS commit, cve",
+  "MATCH (vuln:Vulnerability {id: cve})
+   MATCH (v:Version {tag: tag, commit: commit})
+   MERGE (vuln)-[:AFFECTS_VERSION]->(v)",
+  {batchSize: 1000, parallel: true, retries: 3, params: {rows: $rows}})
+YIELD batches, failedOperations
+RETURN batches, failedOperations
+"""
+
+
+def _check_apoc(driver):
+    """Whether the server exposes apoc.periodic.iterate."""
+    try:
+        with driver.session(database="neo4j") as session:
+            return session.run("CALL apoc.help('periodic.iterate')").peek() is not None
+    except Exception:
+        return False
+
+# DDL for the MERGE/MATCH keys the snapshot write touches. Without these every
+# MERGE degenerates into a label scan that gets slower as the graph grows; with
+# them each row is an index probe. Statements run individually and tolerate
+# failure so a pre-existing equivalent index (e.g. the API's Vulnerability.id
+# constraint) doesn't abort the rest.
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT coderepo_url IF NOT EXISTS FOR (r:CodeRepo) REQUIRE r.url IS UNIQUE",
+    "CREATE INDEX version_tag_commit IF NOT EXISTS FOR (v:Version) ON (v.tag, v.commit)",
+    "CREATE INDEX vulnerability_id_index IF NOT EXISTS FOR (v:Vulnerability) ON (v.id)",
+]
+
+
+# Linguist samples at most this much of each file; large files classify the same
+READ_CAP = 16_384
+
+
+def _classify_tree(repo_path):
+    """Classify every file in-process with enry and sum bytes per language.
+
+    Same classification as github-linguist but without paying a Ruby VM
+    startup per tag; pure-Python walk over a C-speed classifier.
+    """
+    sizes = Counter()
+    stack = [repo_path]
+    while stack:
+        for entry in os.scandir(stack.pop()):
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+                continue
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            try:
+                with open(entry.path, "rb") as f:
+                    sample = f.read(READ_CAP)
+                language = enry.get_language(entry.name, sample)
+            except Exception:
+                continue
+            if language:
+                sizes[language] += entry.stat().st_size
+    return dict(sizes)
+
+
+# Resolved once: the go-enry binary starts in milliseconds where the Ruby
+# linguist pays interpreter warmup on every invocation
+_ENRY_BIN = shutil.which("enry")
+
+# Caps concurrent linguist subprocesses per worker process, independent of the
+# per-tag thread pool, so a repo with many pending tags can't spawn a ruby/go
+# process per tag at once and thrash memory
+_LINGUIST_SEM = threading.BoundedSemaphore(min(4, os.cpu_count() or 4))
+
+
+def _run_linguist_cmd(cmd):
+    """Run a linguist command and parse its JSON stdout.
+
+    stdout lands in an unnamed temp file rather than a pipe: the child writes
+    at its own pace with no pipe-buffer backpressure, and the bytes parse in
+    one pass without the intermediate str that check_output builds.
+    """
+    with _LINGUIST_SEM:
+        with tempfile.TemporaryFile() as tf:
+            proc = subprocess.Popen(cmd, stdout=tf, stderr=subprocess.DEVNULL)
+            returncode = proc.wait()
+            if returncode != 0:
+                raise subprocess.CalledProcessError(returncode, cmd)
+            tf.seek(0)
+            return _json_loads(tf.read())
+
+
+def _linguist_worker(repo_path):
+    """Compute {language: bytes} for a checkout; module-level so pools can pickle it."""
+    if enry is not None:
+        return _classify_tree(repo_path)
+    if _ENRY_BIN:
+        # go-enry emits {language: [files]}; sum file sizes for byte totals
+        breakdown = _run_linguist_cmd([_ENRY_BIN, "-json", repo_path])
+        sizes = {}
+        for lang, files in breakdown.items():
+            total = 0
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(repo_path, name))
+                except OSError:
+                    pass
+            sizes[lang] = total
+        return sizes
+    # Last resort: the Ruby linguist, paying its VM startup per call
+    breakdown = _run_linguist_cmd(["github-linguist", "--json", repo_path])
+    return {lang: stats.get("size", 0) if isinstance(stats, dict) else stats
+            for lang, stats in breakdown.items()}
+
+
+def _language_stats(sizes):
+    """Annotate a {language: bytes} map with percentages in one pass.
+
+    The scale factor is computed once, so each entry costs one multiply
+    instead of a divide against a re-summed total.
+    """
+    total = sum(sizes.values())
+    scale = 100.0 / total if total else 0.0
+    return {lang: {"bytes": b, "percent": round(b * scale, 2)}
+            for lang, b in sizes.items()}
+
+
+def _git_partial_clone_ok():
+    """Whether the installed git supports partial-clone filters (>= 2.27)."""
+    try:
+        out = subprocess.check_output(["git", "--version"]).decode()
+        major, minor = out.split()[2].split(".")[:2]
+        return (int(major), int(minor)) >= (2, 27)
+    except Exception:
+        return False
+
+
+# Resolved once per process; every clone/fetch consults it
+_PARTIAL_CLONE = _git_partial_clone_ok()
+
+
+def _fetch_pending_tags(repo_path, tags, filter_args):
+    """Fetch exactly the given tags in one --no-tags round trip.
+
+    Explicit refspecs plus --no-tags keep the server from advertising and
+    auto-following the rest of the tag namespace, which on tag-heavy repos
+    dwarfs the refs actually needed. Returns False if any tag is missing
+    upstream so the caller can fall back to a full refresh.
+    """
+    refspecs = [f"refs/tags/{tag}:refs/tags/{tag}" for tag in tags]
+    result = subprocess.run(["git", "-C", str(repo_path), "fetch", "--no-tags",
+                             *filter_args, "origin", *refspecs],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode == 0
+
+
+def _ensure_repo(repo_url, repocache, tags=None):
+    """Clone repo_url into the cache directory (or refresh an existing clone).
+
+    When the pending tags are known, the refresh fetches exactly those refs in
+    one command — a single round-trip per repo rather than pulling the full tag
+    namespace every sync.
+    """
+    repo_path = repocache / repo_url.rstrip("/").split("/")[-1].removesuffix(".git")
+    filter_args = ["--filter=blob:none"] if _PARTIAL_CLONE else []
+    # Operator-seeded alternate object store: forks and mirrors share pack
+    # files instead of each pulling the full history. --reference-if-able is a
+    # no-op when shared.git is absent; --dissociate copies the borrowed objects
+    # locally so pruning shared.git can never corrupt a cached clone.
+    shared_alt = repocache / "shared.git"
+    reference_args = (["--reference-if-able", str(shared_alt), "--dissociate"]
+                      if shared_alt.exists() else [])
+    if repo_path.exists():
+        if tags and _fetch_pending_tags(repo_path, tags, filter_args):
+            return repo_path
+        # Some requested tags may not exist upstream (or none were given);
+        # fall back to a full refresh so the ones that do still arrive. Blobs
+        # for new tags are fetched on demand when the worktree materializes.
+        subprocess.run(["git", "-C", str(repo_path), "fetch",
+                        *filter_args, "--tags", "--prune"],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        # Blobless no-tags partial clone: only the default branch's commits and
+        # trees come over the wire, then one targeted fetch brings exactly the
+        # pending tags — the full tag namespace never transfers. Older gits
+        # that lack filter support fall back to a plain no-checkout clone.
+        subprocess.run(["git", "clone", *filter_args, *reference_args,
+                        "--no-tags", "--no-checkout", repo_url, str(repo_path)],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if tags and not _fetch_pending_tags(repo_path, tags, filter_args):
+            subprocess.run(["git", "-C", str(repo_path), "fetch",
+                            *filter_args, "--tags"],
+                           check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return repo_path
+
+
+def _add_worktree(repo_path, tag, worktree_path):
+    """Create a cheap, disposable detached checkout that shares the object DB."""
+    subprocess.run(["git", "-C", str(repo_path), "worktree", "add", "--detach",
+                    str(worktree_path), tag],
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _remove_worktree(repo_path, worktree_path):
+    subprocess.run(["git", "-C", str(repo_path), "worktree", "remove", "--force",
+                    str(worktree_path)],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _commit_for(repo_path, tag):
+    out = subprocess.check_output(["git", "-C", str(repo_path), "rev-parse", f"{tag}^{{commit}}"])
+    return out.decode().strip()
+
+
+def _tree_for(repo_path, tag):
+    out = subprocess.check_output(["git", "-C", str(repo_path), "rev-parse", f"{tag}^{{tree}}"])
+    return out.decode().strip()
+
+
+def _open_linguist_cache(repocache):
+    """Open the shared linguist result cache, keyed by tree SHA.
+
+    Linguist output is deterministic for a given tree, and re-tagged releases
+    often point at identical trees, so a cache hit skips the whole Ruby run.
+    """
+    db = sqlite3.connect(str(repocache / "linguist_cache.sqlite3"), timeout=30)
+    # WAL lets one worker write while others read, instead of serializing every
+    # cache hit behind the exclusive lock of the default rollback journal
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("CREATE TABLE IF NOT EXISTS linguist_cache "
+               "(tree_sha TEXT PRIMARY KEY, json BLOB, ts INTEGER)")
+    return db
+
+
+def _process_repo_worker(repo_url, tags, repocache_dir):
+    """Clone/refresh one repo and analyze its pending tags.
+
+    Module-level so the repo-level ProcessPoolExecutor can pickle it. Each repo
+    is owned by exactly one worker, so no two processes ever clone or fetch the
+    same cache directory concurrently. Returns (tag, commit, languages) tuples;
+    Neo4j writes stay in the parent so one producer can batch them.
+    """
+    repo_path = _ensure_repo(repo_url, Path(repocache_dir), tags=tags)
+
+    # One detached worktree per tag instead of switching a shared checkout:
+    # worktrees share the object DB, so each checkout is cheap and disposable
+    worktree_root = repo_path.parent / (repo_path.name + "_worktrees")
+    worktree_root.mkdir(exist_ok=True)
+    checkouts = {}
+    for tag in tags:
+        worktree_path = worktree_root / tag.replace("/", "_")
+        try:
+            _add_worktree(repo_path, tag, worktree_path)
+            checkouts[tag] = worktree_path
+        except Exception as e:
+            log.warning("Skipping %s@%s: %s", repo_url, tag, e)
+
+    snapshots = []
+    cache = _open_linguist_cache(Path(repocache_dir))
+    try:
+        # Resolve shas and consult the cache up front; the sqlite connection
+        # stays on this thread (it is not shareable across threads by default)
+        resolved = {}
+        languages_by_tag = {}
+        misses = []
+        for tag, worktree_path in checkouts.items():
+            try:
+                tree_sha = _tree_for(repo_path, tag)
+                commit = _commit_for(repo_path, tag)
+            except Exception as e:
+                log.warning("Skipping %s@%s: %s", repo_url, tag, e)
+                continue
+            resolved[tag] = (worktree_path, tree_sha, commit)
+            cached = cache.execute(
+                "SELECT json FROM linguist_cache WHERE tree_sha = ?",
+                (tree_sha,)).fetchone()
+            if cached:
+                languages_by_tag[tag] = _json_loads(cached[0])
+            else:
+                misses.append(tag)
+
+        # The worktrees are independent checkouts sharing one object DB, so
+        # uncached tags classify concurrently on a small thread pool (the
+        # subprocess fallbacks release the GIL while the child runs)
+        if misses:
+            def _classify(tag):
+                try:
+                    return _linguist_worker(str(resolved[tag][0]))
+                except Exception as e:
+                    log.warning("Skipping %s@%s: %s", repo_url, tag, e)
+                    return None
+
+            with ThreadPoolExecutor(max_workers=min(4, len(misses))) as tag_pool:
+                for tag, languages in zip(misses, tag_pool.map(_classify, misses)):
+                    if languages is None:
+                        continue
+                    languages_by_tag[tag] = languages
+                    cache.execute(
+                        "INSERT OR REPLACE INTO linguist_cache VALUES (?, ?, ?)",
+                        (resolved[tag][1], _json_dumps(languages), int(time.time())))
+            cache.commit()
+
+        for tag, (_, _, commit) in resolved.items():
+            if tag in languages_by_tag:
+                snapshots.append((tag, commit, languages_by_tag[tag]))
+    finally:
+        cache.close()
+        for worktree_path in checkouts.values():
+            _remove_worktree(repo_path, worktree_path)
+
+    return snapshots
+
+
+class VersionBuilder:
+    """Build language/version snapshots for every package version in the input JSON."""
+
+    def __init__(self, json_path, workers=None, output_dir=None, batch_size=FLUSH_EVERY,
+                 driver=None):
+        self.json_path = Path(json_path)
+        # Default to one worker per core: the per-repo work is CPU-bound
+        self.workers = workers or os.cpu_count() or 4
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.batch_size = batch_size
+        # A mounted volume (see the repocache volume in docker-compose.yml)
+        # survives container restarts, so clones and the linguist cache
+        # amortize across runs instead of rebuilding from scratch every start
+        self.repocache = Path(os.getenv("REPOCACHE_DIR", "/var/cache/repocache"))
+        try:
+            self.repocache.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            # Unwritable default (e.g. unprivileged bare-metal run): fall back
+            # to the ephemeral location rather than failing the build
+            self.repocache = Path("/tmp/repocache")
+            self.repocache.mkdir(parents=True, exist_ok=True)
+        # Callers embedded in the API pass their shared pooled driver so the
+        # builder doesn't open a second connection pool; standalone runs still
+        # lazily build their own from env credentials
+        self._driver = driver
+        self._owns_driver = driver is None
+        self._pending = []  # buffered snapshot rows, flushed in one UNWIND per batch
+        self._use_apoc = None  # probed against the server on first flush
+        # Flushes run on a small writer pool so Bolt round-trips overlap the
+        # next repos' linguist work instead of pausing result consumption
+        self._flush_pool = None
+        self._flush_futures = []
+
+    # ------------------------------------------------------------------ input
+    def _iter_packages(self):
+        """Yield (package, info) pairs from the minimal-sets JSON.
+
+        With ijson the file is parsed incrementally, so peak RSS is one
+        package's worth of data instead of the whole multi-hundred-MB export;
+        without it the stdlib parse materializes everything as before.
+        """
+        if ijson is not None:
+            with open(self.json_path, "rb") as fh:
+                yield from ijson.kvitems(fh, "")
+            return
+        yield from _json_loads(self.json_path.read_bytes()).items()
+
+    def _load_packages(self):
+        """Group versions and their vulnerability ids by git repository URL.
+
+        The minimal-sets JSON carries an ecosystem, the minimal version list,
+        and a vulnerabilities map of OSV id → affected versions per package.
+        A cloneable URL comes from an explicit repo_url when present, else
+        from resolving the package's purl; packages with neither are skipped
+        (distro ecosystems have no single upstream repo to clone).
+        """
+        repos = {}
+        skipped = 0
+        for pkg, info in self._iter_packages():
+            repo_url = info.get("repo_url")
+            if not repo_url:
+                purl = info.get("purl")
+                if purl and git_url_from_purl is not None:
+                    repo_url = git_url_from_purl(purl)
+            if not repo_url:
+                skipped += 1
+                continue
+            versions = [v for v in info.get("minimal_versions", []) if not v.startswith("pkg:")]
+            if not versions:
+                continue
+            entry = repos.setdefault(repo_url, {"versions": set(), "vulns_by_version": {}})
+            entry["versions"].update(versions)
+            # Invert the vulnerabilities map so each snapshot row links the
+            # tag to exactly the OSV ids whose affected range includes it
+            wanted = set(versions)
+            for vuln_id, affected in (info.get("vulnerabilities") or {}).items():
+                for version in affected:
+                    if version in wanted:
+                        entry["vulns_by_version"].setdefault(version, set()).add(vuln_id)
+        if skipped:
+            log.info("Skipped %d packages without a resolvable git repository", skipped)
+        return repos
+
+    # ------------------------------------------------------------------ neo4j
+    def _get_driver(self):
+        if self._driver is None:
+            self._driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+        return self._driver
+
+    def _ensure_schema(self):
+        """Create the indexes/constraints backing the snapshot MERGE keys."""
+        with self._get_driver().session(database="neo4j") as session:
+            for statement in SCHEMA_STATEMENTS:
+                try:
+                    session.run(statement).consume()
+                except Exception as e:
+                    log.debug("Skipping schema statement (%s)", e)
+
+    def _existing_versions(self):
+        """Fetch every already-persisted (repo, tag) pair in a single query.
+
+        One streamed result set instead of a round-trip per repository; the
+        returned dict lets run() drop known tags before any clone or linguist
+        work is scheduled.
+        """
+        existing = {}
+        with self._get_driver().session(database="neo4j") as session:
+            result = session.run(
+                "MATCH (r:CodeRepo)-[:HAS_VERSION]->(v:Version) "
+                "RETURN r.url AS url, v.tag AS tag")
+            for record in result:
+                existing.setdefault(record["url"], set()).add(record["tag"])
+        return existing
+
+    def _upsert_version_snapshot(self, repo_url, tag, commit, languages, cves):
+        """Buffer one snapshot row; actual writes happen in batched flushes."""
+        self._pending.append({
+            "url": repo_url,
+            "tag": tag,
+            "commit": commit,
+            "languages_json": _json_dumps(languages),
+            "cves": list(cves),
+        })
+        if len(self._pending) >= self.batch_size:
+            self._flush_batch()
+
+    @staticmethod
+    def _tx_write(tx, rows):
+        # Module-level SNAPSHOT_QUERY keeps the string identical across calls,
+        # so the server's plan cache hits on every batch
+        tx.run(SNAPSHOT_QUERY, rows=rows).consume()
+
+    @staticmethod
+    def _tx_write_nodes(tx, rows):
+        tx.run(NODE_MERGE_QUERY, rows=rows).consume()
+
+    def _write_rows(self, rows):
+        driver = self._get_driver()
+        if self._use_apoc is None:
+            # Probed on first flush; a benign race between writer threads just
+            # repeats the cheap probe
+            self._use_apoc = _check_apoc(driver)
+        # Explicit database and empty bookmarks skip the driver's default
+        # database resolution and bookmark negotiation round-trips
+        with driver.session(database="neo4j", bookmarks=()) as session:
+            if self._use_apoc:
+                session.execute_write(self._tx_write_nodes, rows)
+                # periodic.iterate manages its own transactions, so it runs
+                # outside execute_write on an auto-commit session call
+                record = session.run(VULN_LINK_QUERY, rows=rows).single()
+                if record and record["failedOperations"]:
+                    log.warning("%d vulnerability links failed after retries",
+                                record["failedOperations"])
+            else:
+                session.execute_write(self._tx_write, rows)
+        log.info("Flushed %d version snapshots to Neo4j", len(rows))
+
+    def _flush_batch(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        if self._flush_pool is None:
+            # A few concurrent writers keep independent UNWIND transactions in
+            # flight on the connection pool; execute_write retries the
+            # occasional lock conflict between overlapping batches
+            self._flush_pool = ThreadPoolExecutor(max_workers=4,
+                                                  thread_name_prefix="neo4j-writer")
+        self._flush_futures.append(self._flush_pool.submit(self._write_rows, rows))
+
+    def _drain_flushes(self):
+        """Wait for every in-flight batch write and surface any failures."""
+        if self._flush_pool is None:
+            return
+        self._flush_pool.shutdown(wait=True)
+        for future in self._flush_futures:
+            error = future.exception()
+            if error:
+                log.warning("Snapshot flush failed: %s", error)
+        self._flush_pool = None
+        self._flush_futures = []
+
+    # -------------------------------------------------------------------- run
+    def run(self):
+        """Fan repositories out across a process pool; returns the output JSON path (if any)."""
+        start = time.time()
+        repos = self._load_packages()
+        log.info("Processing %d repositories from %s", len(repos), self.json_path.name)
+
+        if self.output_dir is None:
+            # Index the MERGE keys before the first flush so writes never label-scan
+            self._ensure_schema()
+
+        results = {}
+        # Repos are independent and linguist is CPU-bound Ruby, so each repo goes
+        # to its own process; the parent stays the single Neo4j producer so the
+        # batched UNWIND flushes keep working unchanged
+        existing_map = self._existing_versions() if self.output_dir is None else {}
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = {}
+            for repo_url, data in repos.items():
+                existing = existing_map.get(repo_url, set())
+                tags = [tag for tag in sorted(data["versions"]) if tag not in existing]
+                if not tags:
+                    continue
+                future = pool.submit(_process_repo_worker, repo_url, tags, str(self.repocache))
+                futures[future] = repo_url
+
+            for future in as_completed(futures):
+                repo_url = futures[future]
+                try:
+                    snapshots = future.result()
+                except Exception as e:
+                    log.warning("Failed to process %s: %s", repo_url, e)
+                    continue
+
+                for tag, commit, languages in snapshots:
+                    stats = _language_stats(languages)
+                    if self.output_dir is not None:
+                        results.setdefault(repo_url, {})[tag] = stats
+                    else:
+                        cves = sorted(repos[repo_url]["vulns_by_version"].get(tag, ()))
+                        self._upsert_version_snapshot(repo_url, tag, commit, stats, cves)
+
+        output_file = None
+        if self.output_dir is not None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_file = str(self.output_dir / f"version_snapshots_{timestamp}.json")
+            if orjson is not None:
+                Path(output_file).write_bytes(
+                    orjson.dumps(results, option=orjson.OPT_INDENT_2))
+            else:
+                Path(output_file).write_text(json.dumps(results, indent=2))
+        else:
+            self._flush_batch()
+            self._drain_flushes()
+            if self._owns_driver and self._driver is not None:
+                self._driver.close()
+                self._driver = None
+
+        log.info("VersionBuilder processed %d repositories in %.1fs", len(repos), time.time() - start)
+        return output_file